@@ -21,9 +21,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import mmap
+import os
+import re
 import sys
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Iterator, List
+
+import orjson
 
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -53,37 +58,60 @@ def _ingredients_json(recipe: dict[str, Any]) -> str:
     return json.dumps(rows)
 
 
-def _parse_json_blob(text: str) -> List[dict[str, Any]]:
-    text = text.strip()
-    if not text:
-        return []
-    # JSON array
-    if text.startswith("["):
-        data = json.loads(text)
-        if not isinstance(data, list):
-            raise ValueError("root JSON must be an array")
-        return [x for x in data if isinstance(x, dict)]
-    # JSON Lines
-    out: List[dict[str, Any]] = []
-    for line in text.splitlines():
-        line = line.strip()
+_UTF8_BOM = b"\xef\xbb\xbf"
+_NON_WS_RE = re.compile(rb"[^ \t\r\n]")
+
+
+def _first_token(buf) -> int:
+    """Offset of the first non-whitespace byte (after an optional BOM), or -1."""
+    m = _NON_WS_RE.search(buf, len(_UTF8_BOM) if buf[:3] == _UTF8_BOM else 0)
+    return m.start() if m else -1
+
+
+def _iter_json_lines(buf, start: int = 0) -> Iterator[dict[str, Any]]:
+    end = len(buf)
+    while start < end:
+        nl = buf.find(b"\n", start)
+        if nl < 0:
+            nl = end
+        line = buf[start:nl].strip()
+        start = nl + 1
         if not line:
             continue
-        obj = json.loads(line)
+        obj = orjson.loads(line)
         if isinstance(obj, dict):
-            out.append(obj)
-    return out
+            yield obj
+
+
+def _parse_json_blob(buf) -> List[dict[str, Any]]:
+    pos = _first_token(buf)
+    if pos < 0:
+        return []
+    # orjson reads a memoryview in place, so whole-document parses of a
+    # mapped file don't copy it into a bytes object first
+    with memoryview(buf)[pos:] as doc:
+        # JSON array
+        if doc[:1] == b"[":
+            data = orjson.loads(doc)
+            if not isinstance(data, list):
+                raise ValueError("root JSON must be an array")
+            return [x for x in data if isinstance(x, dict)]
+        # JSON Lines, else a single (possibly pretty-printed) object
+        try:
+            return list(_iter_json_lines(buf, pos))
+        except orjson.JSONDecodeError:
+            obj = orjson.loads(doc)
+            return [obj] if isinstance(obj, dict) else []
 
 
 def load_recipes_from_file(path: Path) -> List[dict[str, Any]]:
-    text = path.read_text(encoding="utf-8")
-    recipes = _parse_json_blob(text)
-    if not recipes and text.strip():
-        # single object
-        obj = json.loads(text)
-        if isinstance(obj, dict):
-            recipes = [obj]
-    return recipes
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        # map the file instead of reading it into a str; lines are parsed
+        # from slices of the mapping with orjson
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _parse_json_blob(mm)
 
 
 def load_recipes_from_dir(dir_path: Path) -> List[dict[str, Any]]:
@@ -1,11 +1,20 @@
 import os
+import re
+import functools
+import gzip
+from hashlib import blake2b
 import json
+import shutil
+import tempfile
 import logging
+from collections import Counter, defaultdict
 from datetime import datetime
+import orjson
 from flask import (
-    Flask, render_template, request, jsonify,
+    Flask, Request, Response, current_app, render_template, request, jsonify,
     session, redirect, url_for, flash
 )
+from flask.json.provider import JSONProvider
 from werkzeug.utils import secure_filename
 from logging.handlers import RotatingFileHandler
 
@@ -14,22 +23,65 @@ from src.recipe_database import RecipeDatabase
 from src.utils.util_funcs import parse_ingredient_list, validate_recipe_data
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+UPLOAD_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_LEVEL = 4
+COMPRESS_MIMETYPES = {'application/json', 'text/html', 'text/css', 'application/javascript'}
+# gzip bodies are a different representation, so they get their own etag
+GZIP_ETAG_SUFFIX = '-gzip'
+
+# \w keeps the same unicode letters/digits (plus '_') that str.isalnum() did
+_SLUG_RE = re.compile(r'\W')
+_SLUG_TR = str.maketrans({' ': '_', '-': '_'})
+_LINE_RE = re.compile(r'[^\r\n]+')
+_TAG_RE = re.compile(r'[^,]+')
+_ALLOWED_RE = re.compile(r'\.(?:%s)\Z' % '|'.join(sorted(ALLOWED_EXTENSIONS)), re.IGNORECASE)
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return bool(filename) and _ALLOWED_RE.search(filename) is not None
+
+class SpooledUploadRequest(Request):
+    """Request that spools multipart file parts to disk past SPOOL_MAX_SIZE"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, dir=current_app.config['UPLOAD_FOLDER'])
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def split_stripped(pattern, text):
+    return [s for s in (m.group(0).strip() for m in pattern.finditer(text)) if s]
+
+def next_suffix(base_id, existing_ids):
+    if base_id not in existing_ids:
+        return 0
+    prefix = base_id + '_'
+    used = [int(k[len(prefix):]) for k in existing_ids
+            if k.startswith(prefix) and k[len(prefix):].isdigit()]
+    return max(used, default=0) + 1
+
+def _ensure_dirs():
+    # relative to the cwd, so checked for each app rather than once per process
+    for d in ('static/uploads', 'static/css', 'static/js', 'templates', 'logs'):
+        os.makedirs(d, exist_ok=True)
 
 def create_app():
+    _ensure_dirs()
     app = Flask(__name__)
     app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key')
+    app.json = ORJSONProvider(app)
 
     app.config['UPLOAD_FOLDER'] = 'static/uploads'
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    os.makedirs('static/css', exist_ok=True)
-    os.makedirs('static/js', exist_ok=True)
-    os.makedirs('templates', exist_ok=True)
-    os.makedirs('logs', exist_ok=True)
+    app.config['MAX_FORM_MEMORY_SIZE'] = SPOOL_MAX_SIZE
+    app.request_class = SpooledUploadRequest
 
     handler = RotatingFileHandler('logs/recipe_assistant.log', maxBytes=10240, backupCount=10)
     handler.setLevel(logging.INFO)
@@ -40,6 +92,54 @@ def create_app():
 
     recipe_assistant = RecipeAssistant()
 
+    # bumped on every successful write so read-side caches know when to rebuild;
+    # the counter is per process (see wsgi.py), so etags also carry a random
+    # per-process epoch and never match one issued by an earlier process
+    db_state = {'version': 0, 'epoch': os.urandom(8).hex()}
+    all_cache = {'version': None, 'data': None, 'lower': {}}
+    facets_cache = {'version': None, 'cuisines': [], 'tags': []}
+    api_cache = {'version': None, 'body': b'', 'body_gz': b''}
+
+    def all_recipes():
+        if all_cache['version'] != db_state['version']:
+            data = recipe_assistant.database.get_all_recipes()
+            # canonical lowercase ingredients, computed once per write instead of per request
+            lower = {rid: [i.lower() for i in r.get('ingredients', [])] for rid, r in data.items()}
+            all_cache.update(version=db_state['version'], data=data, lower=lower)
+        return all_cache['data']
+
+    def ingredients_lower(recipe_id):
+        all_recipes()
+        return all_cache['lower'][recipe_id]
+
+    def get_recipes(ids):
+        store = all_recipes()
+        return {i: store[i] for i in ids if i in store}
+
+    def get_facets():
+        if facets_cache['version'] != db_state['version']:
+            cuisines, tags = set(), set()
+            for r in all_recipes().values():
+                if 'cuisine' in r:
+                    cuisines.add(r['cuisine'])
+                if 'tags' in r:
+                    tags.update(r['tags'])
+            facets_cache.update(version=db_state['version'], cuisines=sorted(cuisines), tags=sorted(tags))
+        return facets_cache['cuisines'], facets_cache['tags']
+
+    @functools.lru_cache(maxsize=512)
+    def search_cached(version, ingredients):
+        # version is only part of the key, so a write invalidates every entry
+        matches = recipe_assistant.find_recipes_by_ingredients(sorted(ingredients))
+        return [{
+            'recipe_id': m['recipe_id'],
+            'name': m['recipe']['name'],
+            'match_percentage': round(m['match_percentage'], 1),
+            'cook_time': m['recipe']['cook_time'],
+            'difficulty': m['recipe']['difficulty'],
+            'missing_ingredients': m['missing_ingredients']
+        } for m in matches if m['match_percentage'] >= 20]
+
     @app.route('/')
     def index():
         return render_template('index.html')
@@ -69,23 +169,17 @@ def create_app():
     def browse_recipes():
         filter_type = request.args.get('filter', 'all')
         filter_value = request.args.get('value', '')
-        all_recipes = recipe_assistant.database.get_all_recipes()
 
         if filter_type == 'cuisine' and filter_value:
             filtered = recipe_assistant.database.search_recipes_by_cuisine(filter_value)
         elif filter_type == 'tag' and filter_value:
             filtered = recipe_assistant.database.search_recipes_by_tag(filter_value)
         else:
-            filtered = all_recipes
+            filtered = all_recipes()
 
-        cuisines, tags = set(), set()
-        for r in all_recipes.values():
-            if 'cuisine' in r:
-                cuisines.add(r['cuisine'])
-            if 'tags' in r:
-                tags.update(r['tags'])
+        cuisines, tags = get_facets()
 
-        return render_template('browse.html', recipes=filtered, cuisines=sorted(cuisines), tags=sorted(tags),
+        return render_template('browse.html', recipes=filtered, cuisines=cuisines, tags=tags,
                                current_filter=filter_type, current_value=filter_value)
 
     @app.route('/add_recipe', methods=['GET', 'POST'])
@@ -94,12 +188,12 @@ def create_app():
             recipe_data = {
                 'name': request.form.get('name', '').strip(),
                 'ingredients': parse_ingredient_list(request.form.get('ingredients', '')),
-                'instructions': [i.strip() for i in request.form.get('instructions', '').split('\n') if i.strip()],
+                'instructions': split_stripped(_LINE_RE, request.form.get('instructions', '')),
                 'cook_time': request.form.get('cook_time', '').strip(),
                 'difficulty': request.form.get('difficulty', 'Easy'),
                 'servings': int(request.form.get('servings', 1)),
                 'cuisine': request.form.get('cuisine', '').strip(),
-                'tags': [t.strip() for t in request.form.get('tags', '').split(',') if t.strip()],
+                'tags': split_stripped(_TAG_RE, request.form.get('tags', '')),
                 'created_at': datetime.now().isoformat(),
                 'created_by': 'user'
             }
@@ -110,22 +204,22 @@ def create_app():
                     flash(error, 'error')
                 return render_template('add_recipe.html', recipe_data=recipe_data)
 
-            base_id = ''.join(c for c in recipe_data['name'].lower().replace(' ', '_') if c.isalnum() or c == '_')
-            recipe_id = base_id
-            count = 1
-            while recipe_assistant.database.get_recipe(recipe_id):
-                recipe_id = f"{base_id}_{count}"
-                count += 1
+            base_id = _SLUG_RE.sub('', recipe_data['name'].lower().translate(_SLUG_TR))
+            # ids come from a fresh read, never the cache, so a stale snapshot can't reuse one
+            suffix = next_suffix(base_id, recipe_assistant.database.get_all_recipes())
+            recipe_id = base_id if suffix == 0 else f"{base_id}_{suffix}"
 
             if 'image' in request.files:
                 file = request.files['image']
                 if file and allowed_file(file.filename):
                     filename = secure_filename(f"{recipe_id}_{file.filename}")
                     path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                    file.save(path)
+                    with open(path, 'wb', buffering=0) as out:
+                        shutil.copyfileobj(file.stream, out, length=UPLOAD_CHUNK_SIZE)
                     recipe_data['image'] = filename
 
             if recipe_assistant.database.add_recipe(recipe_id, recipe_data):
+                db_state['version'] += 1
                 flash(f'Recipe "{recipe_data["name"]}" added successfully.', 'success')
                 return redirect(url_for('view_recipe', recipe_id=recipe_id))
             else:
@@ -140,43 +234,69 @@ def create_app():
             flash('No recipes selected.', 'error')
             return redirect(url_for('browse_recipes'))
 
-        shopping_items = {}
+        counts = Counter()
+        recipes_per = defaultdict(list)
+        display = {}
         selected = []
 
+        recipes = get_recipes(recipe_ids)
         for rid in recipe_ids:
-            recipe = recipe_assistant.database.get_recipe(rid)
-            if recipe:
-                selected.append({'id': rid, 'name': recipe['name']})
-                for ing in recipe['ingredients']:
-                    key = ing.lower()
-                    if key in shopping_items:
-                        shopping_items[key]['count'] += 1
-                        shopping_items[key]['recipes'].append(recipe['name'])
-                    else:
-                        shopping_items[key] = {'name': ing, 'count': 1, 'recipes': [recipe['name']]}
+            recipe = recipes.get(rid)
+            if not recipe:
+                continue
+            name = recipe['name']
+            selected.append({'id': rid, 'name': name})
+            ings = recipe['ingredients']
+            keys = ingredients_lower(rid)
+            counts.update(keys)
+            for key, ing in zip(keys, ings):
+                display.setdefault(key, ing)
+                recipes_per[key].append(name)
+
+        shopping_items = {
+            key: {'name': ing, 'count': counts[key], 'recipes': recipes_per[key]}
+            for key, ing in display.items()
+        }
 
         return render_template('shopping_list.html', shopping_items=shopping_items, selected_recipes=selected)
 
     @app.route('/api/v1/recipes')
     def api_recipes():
-        return jsonify(recipe_assistant.database.get_all_recipes())
+        if api_cache['version'] != db_state['version']:
+            body = orjson.dumps(all_recipes())
+            api_cache.update(version=db_state['version'], body=body,
+                             body_gz=gzip.compress(body, compresslevel=COMPRESS_LEVEL))
+        if 'gzip' in request.accept_encodings and len(api_cache['body']) >= COMPRESS_MIN_SIZE:
+            resp = Response(api_cache['body_gz'], mimetype='application/json')
+            resp.headers['Content-Encoding'] = 'gzip'
+            resp.vary.add('Accept-Encoding')
+            return resp
+        resp = Response(api_cache['body'], mimetype='application/json')
+        if len(api_cache['body']) >= COMPRESS_MIN_SIZE:
+            resp.vary.add('Accept-Encoding')
+        return resp
 
     @app.route('/api/v1/search')
     def api_search():
         ingredients = request.args.get('ingredients', '').strip()
         if not ingredients:
             return jsonify({'error': 'No ingredients provided'}), 400
-        parsed = parse_ingredient_list(ingredients)
-        matches = recipe_assistant.find_recipes_by_ingredients(parsed)
-        results = [{
-            'recipe_id': m['recipe_id'],
-            'name': m['recipe']['name'],
-            'match_percentage': round(m['match_percentage'], 1),
-            'cook_time': m['recipe']['cook_time'],
-            'difficulty': m['recipe']['difficulty'],
-            'missing_ingredients': m['missing_ingredients']
-        } for m in matches if m['match_percentage'] >= 20]
-        return jsonify(results)
+        # the frozenset is the cache key: case and repeats don't create new entries
+        parsed = frozenset(i.lower() for i in parse_ingredient_list(ingredients))
+        version = db_state['version']
+        etag = blake2b(f"{db_state['epoch']}:{version}:{','.join(sorted(parsed))}".encode(),
+                       digest_size=16).hexdigest()
+        # a client holding the gzip body revalidates with the suffixed etag
+        matched = next((t for t in (etag, etag + GZIP_ETAG_SUFFIX) if request.if_none_match.contains(t)), None)
+        if matched:
+            resp = Response(status=304)
+            resp.set_etag(matched)
+            resp.vary.add('Accept-Encoding')
+        else:
+            resp = jsonify(search_cached(version, parsed))
+            resp.set_etag(etag)
+        resp.cache_control.max_age = 60
+        return resp
 
     @app.route('/meal_planner')
     def meal_planner():
@@ -185,23 +305,43 @@ def create_app():
     @app.route('/favorites')
     def favorites():
         ids = session.get('favorites', [])
-        recipes = {rid: recipe_assistant.database.get_recipe(rid)
-                   for rid in ids if recipe_assistant.database.get_recipe(rid)}
+        recipes = get_recipes(ids)
         return render_template('favorites.html', recipes=recipes)
 
     @app.route('/toggle_favorite/<recipe_id>')
     def toggle_favorite(recipe_id):
-        favorites = session.get('favorites', [])
+        # manipulated as a set, stored as a list so the session stays JSON-serializable
+        favorites = set(session.get('favorites', []))
         if recipe_id in favorites:
-            favorites.remove(recipe_id)
+            favorites.discard(recipe_id)
             action = 'removed from'
         else:
-            favorites.append(recipe_id)
+            favorites.add(recipe_id)
             action = 'added to'
-        session['favorites'] = favorites
+        session['favorites'] = list(favorites)
         flash(f'Recipe {action} favorites.', 'success')
         return redirect(request.referrer or url_for('view_recipe', recipe_id=recipe_id))
 
+    @app.after_request
+    def compress_response(resp):
+        if (resp.status_code != 200 or resp.direct_passthrough
+                or 'Content-Encoding' in resp.headers
+                or resp.mimetype not in COMPRESS_MIMETYPES):
+            return resp
+        data = resp.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return resp
+        # the encoding now depends on Accept-Encoding, so say so on both branches
+        resp.vary.add('Accept-Encoding')
+        if 'gzip' not in request.accept_encodings:
+            return resp
+        resp.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+        resp.headers['Content-Encoding'] = 'gzip'
+        etag, weak = resp.get_etag()
+        if etag:
+            resp.set_etag(etag + GZIP_ETAG_SUFFIX, weak)
+        return resp
+
     @app.errorhandler(404)
     def not_found(e):
         return render_template('404.html'), 404
@@ -213,4 +353,4 @@ def create_app():
     return app
 
 if __name__ == '__main__':
-    create_app().run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
@@ -0,0 +1,242 @@
+"""
+Tests for the legacy Flask app
+Run from the repo root: python -m pytest legacy/tests/test_app.py
+"""
+
+import unittest
+import importlib.util
+import sys
+import os
+import tempfile
+import types
+from unittest import mock
+
+# the app imports src.* from the repo root and is itself imported as a top-level module
+LEGACY_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(LEGACY_DIR, '..'))
+sys.path.insert(0, LEGACY_DIR)
+
+HAS_FLASK = importlib.util.find_spec('flask') is not None
+
+if HAS_FLASK:
+    # the recipe modules the app was written against aren't in this tree; the
+    # tests replace RecipeAssistant with FakeAssistant, so placeholders will do
+    for name, attr in (('src.recipe_assistant', 'RecipeAssistant'), ('src.recipe_database', 'RecipeDatabase')):
+        if importlib.util.find_spec(name) is None:
+            module = types.ModuleType(name)
+            setattr(module, attr, None)
+            sys.modules[name] = module
+    import app as legacy_app
+
+
+class FakeDatabase:
+    """In-memory stand-in for RecipeDatabase"""
+
+    def __init__(self, recipes):
+        self.recipes = dict(recipes)
+        self.reads = 0
+
+    def get_all_recipes(self):
+        self.reads += 1
+        return dict(self.recipes)
+
+    def get_recipe(self, recipe_id):
+        return self.recipes.get(recipe_id)
+
+    def add_recipe(self, recipe_id, recipe_data):
+        self.recipes[recipe_id] = recipe_data
+        return True
+
+
+class FakeAssistant:
+    """Stand-in for RecipeAssistant that matches any recipe sharing an ingredient"""
+
+    def __init__(self, database):
+        self.database = database
+
+    def find_recipes_by_ingredients(self, ingredients):
+        wanted = set(ingredients)
+        return [{
+            'recipe_id': rid,
+            'recipe': r,
+            'match_percentage': 100.0,
+            'missing_ingredients': []
+        } for rid, r in self.database.get_all_recipes().items()
+            if wanted & {i.lower() for i in r['ingredients']}]
+
+
+def make_recipe(name, ingredients):
+    return {
+        'name': name,
+        'ingredients': ingredients,
+        'instructions': ['Cook it'],
+        'cook_time': '10 minutes',
+        'difficulty': 'Easy',
+        'servings': 2
+    }
+
+
+@unittest.skipUnless(HAS_FLASK, "flask not installed")
+class AppTestCase(unittest.TestCase):
+    """Builds an app over a FakeDatabase inside a temporary working directory"""
+
+    def setUp(self):
+        # create_app makes its directories and log file relative to the cwd
+        self.old_cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmpdir.name)
+
+        self.database = FakeDatabase({'pancakes': make_recipe('Pancakes', ['flour', 'egg'])})
+        self.app = self.make_app()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        # the app's log handler keeps the file open, which would block cleanup on some platforms
+        for handler in list(self.app.logger.handlers):
+            self.app.logger.removeHandler(handler)
+            handler.close()
+        os.chdir(self.old_cwd)
+        self.tmpdir.cleanup()
+
+    def make_app(self):
+        with mock.patch.object(legacy_app, 'RecipeAssistant', lambda: FakeAssistant(self.database)):
+            app = legacy_app.create_app()
+        app.config['TESTING'] = True
+        return app
+
+    def add_recipe(self, name):
+        return self.client.post('/add_recipe', data={
+            'name': name,
+            'ingredients': 'flour, egg, milk',
+            'instructions': 'Mix\nCook',
+            'cook_time': '10 minutes',
+            'difficulty': 'Easy',
+            'servings': '2'
+        })
+
+
+class TestCreateApp(AppTestCase):
+    """Test app setup"""
+
+    def test_creates_directories_in_each_working_directory(self):
+        for d in ('static/uploads', 'static/css', 'static/js', 'templates', 'logs'):
+            self.assertTrue(os.path.isdir(d), d)
+
+        # a second app in another directory must not assume the first one's dirs
+        with tempfile.TemporaryDirectory() as other:
+            os.chdir(other)
+            try:
+                self.make_app()
+                self.assertTrue(os.path.isdir('logs'))
+            finally:
+                os.chdir(self.tmpdir.name)
+
+
+@unittest.skipUnless(HAS_FLASK, "flask not installed")
+class TestNextSuffix(unittest.TestCase):
+    """Test recipe id suffixing"""
+
+    def test_unused_id_gets_no_suffix(self):
+        self.assertEqual(legacy_app.next_suffix('pancakes', {'waffles': {}}), 0)
+
+    def test_first_duplicate_gets_one(self):
+        self.assertEqual(legacy_app.next_suffix('pancakes', {'pancakes': {}}), 1)
+
+    def test_suffix_follows_highest_existing(self):
+        existing = {'pancakes': {}, 'pancakes_1': {}, 'pancakes_4': {}}
+        self.assertEqual(legacy_app.next_suffix('pancakes', existing), 5)
+
+    def test_ignores_ids_that_only_share_a_prefix(self):
+        existing = {'pancakes': {}, 'pancakes_vegan': {}, 'pancakes_2x': {}}
+        self.assertEqual(legacy_app.next_suffix('pancakes', existing), 1)
+
+
+class TestAddRecipe(AppTestCase):
+    """Test recipe id allocation when adding recipes"""
+
+    def test_duplicate_names_get_suffixed_ids(self):
+        self.client.get('/api/v1/recipes')  # warm the cache before the writes
+        self.add_recipe('Pancakes')
+        self.add_recipe('Pancakes')
+        self.assertTrue({'pancakes', 'pancakes_1', 'pancakes_2'} <= set(self.database.recipes))
+
+
+class TestListingCache(AppTestCase):
+    """Test the version-stamped recipe listing cache"""
+
+    def test_listing_is_cached_until_a_write(self):
+        first = self.client.get('/api/v1/recipes').get_json()
+        reads = self.database.reads
+        self.assertEqual(self.client.get('/api/v1/recipes').get_json(), first)
+        self.assertEqual(self.database.reads, reads)
+
+        self.assertEqual(self.add_recipe('Crepes').status_code, 302)
+        self.assertIn('crepes', self.client.get('/api/v1/recipes').get_json())
+
+
+class TestSearchEtag(AppTestCase):
+    """Test conditional requests on /api/v1/search"""
+
+    def test_matching_etag_gets_not_modified(self):
+        first = self.client.get('/api/v1/search?ingredients=egg')
+        self.assertEqual(len(first.get_json()), 1)
+
+        cached = self.client.get('/api/v1/search?ingredients=egg',
+                                 headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_etag_changes_after_a_write(self):
+        etag = self.client.get('/api/v1/search?ingredients=egg').headers['ETag']
+
+        self.add_recipe('Crepes')
+        fresh = self.client.get('/api/v1/search?ingredients=egg', headers={'If-None-Match': etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh.headers['ETag'], etag)
+        self.assertEqual(len(fresh.get_json()), 2)
+
+    def test_etag_ignores_case_and_order(self):
+        first = self.client.get('/api/v1/search?ingredients=egg, flour').headers['ETag']
+        second = self.client.get('/api/v1/search?ingredients=Flour, EGG').headers['ETag']
+        self.assertEqual(first, second)
+
+
+class TestCompression(AppTestCase):
+    """Test gzip responses and their validators"""
+
+    def setUp(self):
+        super().setUp()
+        # enough matches that the search body passes COMPRESS_MIN_SIZE
+        for i in range(30):
+            self.database.recipes[f'omelette_{i}'] = make_recipe(f'Omelette {i}', ['egg', 'cheese'])
+
+    def test_gzip_search_gets_its_own_etag(self):
+        plain = self.client.get('/api/v1/search?ingredients=egg')
+        gzipped = self.client.get('/api/v1/search?ingredients=egg', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertIsNone(plain.headers.get('Content-Encoding'))
+        self.assertEqual(gzipped.headers['Content-Encoding'], 'gzip')
+        plain_etag = plain.headers['ETag'].strip('"')
+        self.assertEqual(gzipped.headers['ETag'].strip('"'), plain_etag + legacy_app.GZIP_ETAG_SUFFIX)
+        for resp in (plain, gzipped):
+            self.assertIn('Accept-Encoding', resp.headers.get('Vary', ''))
+
+    def test_search_accepts_the_gzip_etag(self):
+        etag = self.client.get('/api/v1/search?ingredients=egg', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+        resp = self.client.get('/api/v1/search?ingredients=egg',
+                               headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.headers['ETag'], etag)
+        self.assertIn('Accept-Encoding', resp.headers.get('Vary', ''))
+
+    def test_recipes_listing_varies_on_encoding(self):
+        plain = self.client.get('/api/v1/recipes')
+        gzipped = self.client.get('/api/v1/recipes', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(gzipped.headers['Content-Encoding'], 'gzip')
+        for resp in (plain, gzipped):
+            self.assertIn('Accept-Encoding', resp.headers.get('Vary', ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
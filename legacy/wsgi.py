@@ -0,0 +1,15 @@
+"""
+WSGI entry point for the legacy Flask app
+
+Production:
+    gunicorn -k gevent -w 1 --worker-connections 1000 wsgi:app
+
+Run a single worker: the recipe, facet, search and /api/v1/recipes caches
+are invalidated by an in-process write counter, so with several workers a
+write in one would leave the others serving stale data. gevent gives the
+one worker its concurrency.
+"""
+
+from app import create_app
+
+app = create_app()
@@ -3,13 +3,9 @@
 Script to populate the database with sample recipes
 """
 
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent))
-
 from src.database import get_db
 from src.config.settings import get_settings
-import json
+import orjson
 
 settings = get_settings()
 
@@ -236,14 +232,6 @@ def main():
     db = get_db(settings.DATABASE_URL)
     cursor = db.conn.cursor()
     
-    # Check if we already have recipes
-    cursor.execute("SELECT COUNT(*) as count FROM recipes WHERE is_deleted = 0")
-    count = cursor.fetchone()['count']
-    
-    if count > 0:
-        print(f"Database already has {count} recipes. Skipping population.")
-        return
-    
     print("Adding sample recipes to database...")
     
     # Get or create a default user (user_id = 1)
@@ -263,40 +251,52 @@ def main():
         user_id = user_row['id']
         print(f"Using existing user (ID: {user_id})")
     
-    # Insert recipes
-    for recipe in sample_recipes:
-        total_time = recipe['prep_time'] + recipe['cook_time']
-        cursor.execute("""
+    # Insert recipes in one batched transaction; JSON blobs are serialized
+    # up front so the write transaction only covers the executemany
+    rows = [(
+        user_id,
+        recipe['title'],
+        recipe['description'],
+        recipe.get('source_url'),
+        recipe.get('source_name'),
+        orjson.dumps(recipe['ingredients']).decode(),
+        orjson.dumps(recipe['instructions']).decode(),
+        recipe.get('image_url'),
+        recipe['prep_time'],
+        recipe['cook_time'],
+        recipe['prep_time'] + recipe['cook_time'],
+        recipe['servings'],
+        recipe['difficulty'],
+        recipe['cuisine'],
+        recipe['title']
+    ) for recipe in sample_recipes]
+    
+    db.conn.execute("BEGIN")
+    try:
+        # skip samples whose title is already live, so reruns are idempotent
+        # and newly added samples still get topped up
+        cursor.executemany("""
             INSERT INTO recipes (
                 created_by, title, description, source_url, source_name,
                 ingredients_json, instructions_json,
                 image_url, prep_time_minutes, cook_time_minutes, total_time_minutes,
                 servings, difficulty, cuisine
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            user_id,
-            recipe['title'],
-            recipe['description'],
-            recipe.get('source_url'),
-            recipe.get('source_name'),
-            json.dumps(recipe['ingredients']),
-            json.dumps(recipe['instructions']),
-            recipe.get('image_url'),
-            recipe['prep_time'],
-            recipe['cook_time'],
-            total_time,
-            recipe['servings'],
-            recipe['difficulty'],
-            recipe['cuisine']
-        ))
-        print(f"  ✓ Added: {recipe['title']}")
-    
-    db.conn.commit()
+            )
+            SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (
+                SELECT 1 FROM recipes WHERE title = ? AND is_deleted = 0
+            )
+        """, rows)
+        added = cursor.rowcount
+        db.conn.commit()
+    except Exception:
+        db.conn.rollback()
+        raise
     
-    # Verify
-    cursor.execute("SELECT COUNT(*) as count FROM recipes WHERE is_deleted = 0")
-    final_count = cursor.fetchone()['count']
-    print(f"\n✓ Successfully added {final_count} recipes to database!")
+    if added == 0:
+        print("All sample recipes are already in the database.")
+    else:
+        print(f"\n✓ Successfully added {added} recipes to database!")
     
     # Show some stats
     cursor.execute("""
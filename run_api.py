@@ -4,12 +4,11 @@ Recipe Assistant API Runner
 Simple script to run the FastAPI application
 """
 
-import sys
 import os
 from pathlib import Path
 
-#add src to path
-sys.path.insert(0, str(Path(__file__).parent))
+#no sys.path edits needed: running this file already puts the repo root
+#(its own directory) first on sys.path, so `src` resolves as a package
 
 #ensure directories exist
 Path("data").mkdir(exist_ok=True)
@@ -38,12 +37,21 @@ print()
 if __name__ == "__main__":
     import uvicorn
     
+    #reload mode is single-process; otherwise run WORKERS processes on
+    #uvloop + httptools. the request logging middleware already writes one
+    #line per response, so uvicorn's own access log is off
+    server_options = {"reload": True} if settings.DEBUG else {
+        "workers": settings.WORKERS,
+        "loop": "uvloop",
+        "http": "httptools",
+    }
+    
     uvicorn.run(
         "src.api.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG,
         log_level=settings.LOG_LEVEL.lower(),
-        access_log=True
+        access_log=False,
+        **server_options
     )
 
@@ -4,18 +4,31 @@ main application entry point with complete setup
 """
 
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
+import atexit
+import orjson
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import time
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+
 #add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.config.settings import get_settings
 from src.api.middleware import setup_middleware, setup_exception_handlers, limiter
+from src.services.recipe_scraper import create_http_client
+from src.services.claude_client import ClaudeClientFactory
 from src.api.routes.users import router as auth_router, user_router
 from src.api.routes.recipes import router as recipe_router
 from src.api.routes.ratings import router as rating_router
@@ -31,15 +44,143 @@ from src.database.migration_runner import MigrationRunner
 #get settings
 settings = get_settings()
 
+#values read on every request, resolved once at import
+IS_PROD = settings.is_production
+DOCS_URL = "/docs" if not IS_PROD else "disabled"
+LOG_LEVEL = getattr(logging, settings.LOG_LEVEL)
+
+#root response never changes for the life of the process, so serialize it once
+ROOT_BODY = orjson.dumps({
+    "name": settings.APP_NAME,
+    "version": settings.APP_VERSION,
+    "status": "operational",
+    "environment": settings.ENVIRONMENT,
+    "docs": DOCS_URL,
+})
+
+#db stats reused across health probes for this many seconds
+HEALTH_STATS_TTL = 1.0
+_health_stats = {"expires": 0.0, "stats": None}
+
 #configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(settings.LOG_FILE)
-    ]
+#handlers run on a background listener thread so request handlers never block on
+#log i/o; the listener starts as soon as the queue handler is installed (so plain
+#imports and scripts log too, not only a running app) and drains at exit
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_SYNC_EVERY = 128
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    size-rotated log file that leaves records in the stream's buffer instead of
+    flushing each one; write_out() flushes them in one write, and syncs to disk
+    once LOG_SYNC_EVERY records have gone out since the last sync
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._unsynced = 0
+        super().__init__(*args, **kwargs)
+
+    def _open(self):
+        stream = super()._open()
+        # tracked here because the stdlib size check seeks, which flushes the buffer
+        self._size = os.fstat(stream.fileno()).st_size
+        return stream
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self._size and self._size + len(msg) >= self.maxBytes:
+                self.doRollover()
+            self.stream.write(msg)
+            self._size += len(msg)
+            self._unsynced += 1
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def write_out(self):
+        self.acquire()
+        try:
+            if not self.stream:
+                return
+            self.stream.flush()
+            if self._unsynced >= LOG_SYNC_EVERY:
+                getattr(os, 'fdatasync', os.fsync)(self.stream.fileno())
+                self._unsynced = 0
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """writes the file out each time the queue runs dry, so a burst of records costs one write"""
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            _file_handler.write_out()
+            return self.queue.get(block)
+
+
+#lock on this process's log slot, held open for the life of the process
+_log_slot_lock = None
+
+
+def _log_file_path() -> str:
+    """
+    the log file for this process; RotatingFileHandler can't be shared across
+    processes, so with several workers each one takes the lowest free slot and
+    writes and rotates that slot's file. the slot is held by a lock the os
+    drops when the process exits, so a respawned worker reuses its
+    predecessor's file and the file set stays bounded by the number of
+    workers (no flock on windows: all processes share the one file)
+    """
+    global _log_slot_lock
+    if settings.WORKERS <= 1 or fcntl is None:
+        return settings.LOG_FILE
+    path = Path(settings.LOG_FILE)
+    slot = 0
+    while True:
+        lock = open(path.with_name(f"{path.stem}.{slot}.lock"), "w")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            slot += 1
+            continue
+        _log_slot_lock = lock
+        return str(path.with_name(f"{path.stem}.{slot}{path.suffix}"))
+
+
+_log_formatter = logging.Formatter(LOG_FORMAT)
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(_log_formatter)
+_file_handler = BufferedRotatingFileHandler(
+    _log_file_path(),
+    maxBytes=settings.LOG_MAX_BYTES,
+    backupCount=settings.LOG_BACKUP_COUNT
 )
+_file_handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+#the queue handler only renders the message; the listener's handlers add the layout
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+log_listener = BatchingQueueListener(
+    _log_queue,
+    _stream_handler,
+    _file_handler,
+    respect_handler_level=True
+)
+logging.basicConfig(level=LOG_LEVEL, handlers=[_queue_handler])
+log_listener.start()
+#registered after logging's own atexit hook, so it runs first: the queue is
+#drained into the handlers before logging.shutdown() flushes and closes them
+atexit.register(log_listener.stop)
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +201,7 @@ async def lifespan(app: FastAPI):
     #initialize database
     try:
         db = get_db(settings.DATABASE_URL)
+        app.state.db = db
         stats = db.get_stats()
         logger.info(f"database initialized: {stats}")
         
@@ -72,6 +214,23 @@ async def lifespan(app: FastAPI):
         logger.error(f"failed to initialize database: {e}")
         raise
     
+    #shared redis pool for cross-worker caches (optional)
+    app.state.redis = None
+    if settings.CACHE_ENABLED and settings.REDIS_URL:
+        import redis.asyncio as aioredis
+        pool = aioredis.ConnectionPool.from_url(settings.REDIS_URL, max_connections=20)
+        app.state.redis = aioredis.Redis(connection_pool=pool)
+        logger.info("redis cache pool created")
+    
+    #keep-alive http client for recipe url imports
+    app.state.http = create_http_client()
+    
+    #build the system claude client (and its pool/ssl context) before the first request
+    from src.api.routes import ai
+    if ai.HAS_SYSTEM_KEY:
+        ClaudeClientFactory.get_system_client(ai.SYSTEM_API_KEY)
+        logger.info("claude system client ready")
+    
     logger.info("application startup complete")
     
     yield
@@ -79,10 +238,22 @@ async def lifespan(app: FastAPI):
     #shutdown
     logger.info("shutting down application...")
     
+    #close redis pool
+    if app.state.redis is not None:
+        try:
+            await app.state.redis.aclose()
+            await app.state.redis.connection_pool.disconnect()
+            logger.info("redis cache pool closed")
+        except Exception as e:
+            logger.error(f"error closing redis pool: {e}")
+    
+    #close http client
+    await app.state.http.aclose()
+    await ClaudeClientFactory.aclose()
+    
     #close database connections
     try:
-        db = get_db(settings.DATABASE_URL)
-        db.close()
+        app.state.db.close()
         logger.info("database connections closed")
     except Exception as e:
         logger.error(f"error closing database: {e}")
@@ -95,9 +266,10 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="a comprehensive recipe management system with ai-powered features",
-    docs_url="/docs" if not settings.is_production else None,
-    redoc_url="/redoc" if not settings.is_production else None,
-    openapi_url="/openapi.json" if not settings.is_production else None,
+    docs_url="/docs" if not IS_PROD else None,
+    redoc_url="/redoc" if not IS_PROD else None,
+    openapi_url="/openapi.json" if not IS_PROD else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -124,23 +296,21 @@ app.include_router(ai_router, prefix=settings.API_V1_PREFIX)
 @app.get("/", tags=["root"])
 async def root():
     """root endpoint - api information"""
-    return {
-        "name": settings.APP_NAME,
-        "version": settings.APP_VERSION,
-        "status": "operational",
-        "environment": settings.ENVIRONMENT,
-        "docs": "/docs" if not settings.is_production else "disabled",
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 
 #health check endpoint
 @app.get("/health", tags=["health"])
-async def health_check():
+async def health_check(request: Request):
     """health check endpoint"""
     try:
-        #check database connection
-        db = get_db(settings.DATABASE_URL)
-        stats = db.get_stats()
+        #check database connection (bound once at startup); stats are cached
+        #briefly so bursts of liveness probes share one round of count queries
+        now = time.monotonic()
+        if now >= _health_stats["expires"]:
+            _health_stats["stats"] = request.app.state.db.get_stats()
+            _health_stats["expires"] = now + HEALTH_STATS_TTL
+        stats = _health_stats["stats"]
         
         return {
             "status": "healthy",
@@ -149,7 +319,7 @@ async def health_check():
         }
     except Exception as e:
         logger.error(f"health check failed: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={
                 "status": "unhealthy",
@@ -160,17 +330,16 @@ async def health_check():
 
 #database stats endpoint (protected in production)
 @app.get("/stats", tags=["admin"])
-async def get_stats():
+async def get_stats(request: Request):
     """get database statistics"""
-    if settings.is_production:
-        return JSONResponse(
+    if IS_PROD:
+        return ORJSONResponse(
             status_code=status.HTTP_403_FORBIDDEN,
             content={"detail": "not available in production"}
         )
     
     try:
-        db = get_db(settings.DATABASE_URL)
-        stats = db.get_stats()
+        stats = request.app.state.db.get_stats()
         return stats
     except Exception as e:
         logger.error(f"error getting stats: {e}")
@@ -189,7 +358,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             "type": error["type"]
         })
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "validation error",
@@ -207,6 +376,6 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.DEBUG,
         log_level=settings.LOG_LEVEL.lower(),
-        access_log=True
+        access_log=False
     )
 
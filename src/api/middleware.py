@@ -4,106 +4,250 @@ Handles authentication, rate limiting, CORS, error handling, and request logging
 """
 
 from fastapi import Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import time
+import hashlib
 import logging
-from typing import Callable
+import random
 import secrets
 
+from src.config.settings import get_settings
+
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+def client_ip_key(request: Request) -> str:
+    """Rate limit key: client ip resolved once per request by UnifiedMiddleware"""
+    return getattr(request.state, "client_ip", None) or get_remote_address(request)
+
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Rate limiter - counters live in redis when configured so every worker
+# shares the same limits; falls back to in-process memory if redis is down
+limiter = Limiter(
+    key_func=client_ip_key,
+    storage_uri=settings.REDIS_URL or "memory://",
+    in_memory_fallback_enabled=bool(settings.REDIS_URL)
+)
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log all requests"""
+class UnifiedMiddleware:
+    """
+    Pure ASGI middleware for request logging, timing, security headers and
+    global error handling. One frame per request instead of one
+    BaseHTTPMiddleware task per concern.
+    """
+    
+    # raw ASGI (name, value) pairs, spliced into every response as-is
+    SECURITY_HEADERS = [
+        (b"x-content-type-options", b"nosniff"),
+        (b"x-frame-options", b"DENY"),
+        (b"x-xss-protection", b"1; mode=block"),
+        (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    ]
+    
+    # fraction of successful (<400) responses that get a log line;
+    # 4xx/5xx are always logged
+    SUCCESS_LOG_SAMPLE_RATE = 0.1
     
-    async def dispatch(self, request: Request, call_next: Callable):
-        """Log request and response"""
-        start_time = time.time()
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # monotonic clock for durations; log args are only formatted
+        # if a handler actually emits the record
+        now = time.perf_counter
+        start_time = now()
+        method, path = scope["method"], scope["path"]
+        response_started = False
+        
+        # Resolve the client ip once; the limiter key reads it from request.state
+        client = scope.get("client")
+        scope.setdefault("state", {})["client_ip"] = client[0] if client else "127.0.0.1"
+        
+        # Log request (debug only, the response line carries the same info)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request: %s %s", method, path)
         
-        # Log request
-        logger.info(f"Request: {request.method} {request.url.path}")
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                process_time = now() - start_time
+                
+                # Add custom and security headers in one splice
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-process-time", str(process_time).encode()),
+                    *self.SECURITY_HEADERS,
+                ]
+                
+                # Log response, sampling the successful ones
+                status_code = message["status"]
+                if status_code >= 400 or random.random() < self.SUCCESS_LOG_SAMPLE_RATE:
+                    logger.info(
+                        "Response: %s %s - Status: %s - Time: %.4fs",
+                        method, path, status_code, process_time
+                    )
+            await send(message)
         
         try:
-            response = await call_next(request)
-            
-            # Log response
-            process_time = time.time() - start_time
-            logger.info(
-                f"Response: {request.method} {request.url.path} - "
-                f"Status: {response.status_code} - "
-                f"Time: {process_time:.4f}s"
-            )
-            
-            # Add custom headers
-            response.headers["X-Process-Time"] = str(process_time)
-            
-            return response
+            await self.app(scope, receive, send_wrapper)
         
         except Exception as e:
-            logger.error(f"Request failed: {request.method} {request.url.path} - Error: {str(e)}")
-            raise
-
-
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    """Middleware for global error handling"""
+            logger.error("Request failed: %s %s - Error: %s", method, path, e)
+            # Too late to swap in an error body once headers are out
+            if response_started or isinstance(e, HTTPException):
+                raise
+            await self._error_response(e)(scope, receive, send_wrapper)
     
-    async def dispatch(self, request: Request, call_next: Callable):
-        """Handle errors globally"""
-        try:
-            return await call_next(request)
-        
-        except HTTPException:
-            # Re-raise HTTP exceptions as they are already formatted
-            raise
-        
-        except ValueError as e:
-            logger.error(f"ValueError: {str(e)}")
-            return JSONResponse(
+    @staticmethod
+    def _error_response(exc: Exception) -> Response:
+        """Map an unhandled exception to a JSON error response"""
+        if isinstance(exc, ValueError):
+            return ORJSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                content={"detail": str(e)}
+                content={"detail": str(exc)}
             )
         
-        except PermissionError as e:
-            logger.error(f"PermissionError: {str(e)}")
-            return JSONResponse(
+        if isinstance(exc, PermissionError):
+            return ORJSONResponse(
                 status_code=status.HTTP_403_FORBIDDEN,
                 content={"detail": "Permission denied"}
             )
         
-        except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={
-                    "detail": "Internal server error",
-                    "message": "An unexpected error occurred. Please try again later."
-                }
-            )
+        logger.error(f"Unexpected error: {str(exc)}", exc_info=exc)
+        return ORJSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={
+                "detail": "Internal server error",
+                "message": "An unexpected error occurred. Please try again later."
+            }
+        )
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to add security headers"""
+class ResponseCacheMiddleware:
+    """
+    Pure ASGI cache of JSON bodies of hot read-only GET endpoints in redis;
+    only installed when redis is configured (see setup_middleware)
+    
+    Hits are answered before routing, so neither auth nor the route's own
+    dependencies run: entries are keyed on the Authorization header, but a
+    token that expires after its response was cached keeps getting that
+    response for up to CACHE_TTL_SECONDS. Successful recipe, favorite,
+    rating and pantry writes invalidate every entry; recipes saved by other
+    routes (AI generation, meal plans) show up as entries expire.
+    """
     
-    async def dispatch(self, request: Request, call_next: Callable):
-        """Add security headers to response"""
-        response = await call_next(request)
+    CACHE_TTL_SECONDS = 300
+    VERSION_KEY = "respcache:version"
+    WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+    
+    def __init__(self, app: ASGIApp, prefix: str = "/api/v1"):
+        self.app = app
+        # recipe search and recommendations only; /recipes/{id} is left out
+        # because every read bumps the recipe's view_count
+        self.cached_paths = (f"{prefix}/recipes", f"{prefix}/recommendations/")
+        # /recipes... also covers favorites and new ratings (/recipes/{id}/...)
+        self.invalidating_paths = (f"{prefix}/recipes", f"{prefix}/ratings/", f"{prefix}/users/me/pantry")
+    
+    def _is_cacheable(self, path: str) -> bool:
+        return path == self.cached_paths[0] or path.startswith(self.cached_paths[1])
+    
+    def _is_invalidating(self, path: str) -> bool:
+        return path.startswith(self.invalidating_paths)
+    
+    def _cache_key(self, request: Request, version: bytes) -> str:
+        # sorted params so ?q=a&limit=2 and ?limit=2&q=a share an entry;
+        # auth header is part of the key since results include per-user data
+        params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        auth = request.headers.get("authorization", "")
+        raw = f"{version.decode() if version else '0'}|{request.url.path}?{params}|{auth}"
+        return "respcache:" + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        redis = getattr(scope["app"].state, "redis", None)
+        if redis is None:
+            await self.app(scope, receive, send)
+            return
         
-        return response
+        method = scope["method"]
+        if method in self.WRITE_METHODS and self._is_invalidating(scope["path"]):
+            await self._invalidating_call(redis, scope, receive, send)
+            return
+        
+        request = Request(scope, receive)
+        if (method != "GET" or not self._is_cacheable(scope["path"])
+                or "no-cache" in request.headers.get("cache-control", "")):
+            await self.app(scope, receive, send)
+            return
+        
+        try:
+            version = await redis.get(self.VERSION_KEY)
+            key = self._cache_key(request, version)
+            cached = await redis.get(key)
+        except Exception as e:
+            logger.error(f"Response cache read failed: {str(e)}")
+            await self.app(scope, receive, send)
+            return
+        
+        if cached is not None:
+            response = Response(content=cached, media_type="application/json", headers={"X-Cache": "HIT"})
+            await response(scope, receive, send)
+            return
+        
+        # pass the response through untouched, collecting a cacheable body as it goes
+        body = []
+        cacheable = False
+        
+        async def send_wrapper(message: Message):
+            nonlocal cacheable
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", ()))
+                cacheable = (message["status"] == 200
+                             and headers.get(b"content-type", b"").startswith(b"application/json"))
+                if cacheable:
+                    message["headers"] = [*message.get("headers", ()), (b"x-cache", b"MISS")]
+            elif message["type"] == "http.response.body" and cacheable:
+                body.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    try:
+                        await redis.setex(key, self.CACHE_TTL_SECONDS, b"".join(body))
+                    except Exception as e:
+                        logger.error(f"Response cache write failed: {str(e)}")
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+    
+    async def _invalidating_call(self, redis, scope: Scope, receive: Receive, send: Send):
+        """run a write and, if it succeeded, invalidate every cached entry"""
+        status_code = 500
+        
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+        if status_code < 400:
+            try:
+                await redis.incr(self.VERSION_KEY)
+            except Exception as e:
+                logger.error(f"Response cache invalidation failed: {str(e)}")
 
 
 def setup_cors(app):
@@ -143,19 +287,18 @@ def setup_middleware(app):
     """Setup all middleware"""
     # Order matters - middleware is executed in reverse order of addition
     
-    # 1. Error handling (outermost)
-    app.add_middleware(ErrorHandlingMiddleware)
-    
-    # 2. Security headers
-    app.add_middleware(SecurityHeadersMiddleware)
+    # 0. Response cache (innermost, so cached hits still get headers and logging);
+    #    only with redis, the same condition the lifespan uses to create the pool
+    if settings.CACHE_ENABLED and settings.REDIS_URL:
+        app.add_middleware(ResponseCacheMiddleware, prefix=settings.API_V1_PREFIX)
     
-    # 3. Request logging
-    app.add_middleware(RequestLoggingMiddleware)
+    # 1. Error handling, security headers, timing and request logging
+    app.add_middleware(UnifiedMiddleware)
     
-    # 4. CORS
+    # 2. CORS
     setup_cors(app)
     
-    # 5. Rate limiting
+    # 3. Rate limiting
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
     
@@ -165,7 +308,7 @@ def setup_middleware(app):
 # Custom exception handlers
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
@@ -177,7 +320,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 
 async def validation_exception_handler(request: Request, exc: Exception):
     """Custom validation exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "detail": "Validation error",
@@ -3,16 +3,26 @@ AI-powered features API endpoints
 handles Claude API integration for recipe generation and cooking assistance
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from collections import OrderedDict
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable
+import asyncio
+import hashlib
 import logging
+import orjson
 import os
+import time
 
 from src.models.user import UserResponse
-from src.models.recipe import RecipeCreate, RecipeResponse
+from src.models.recipe import RecipeCreate, RecipeResponse, recipe_ingredient_list_adapter
+from src.models.meal_plan import MealPlanCreate, DayPlan, DayMeal
 from src.services.claude_client import ClaudeClient, ClaudeClientFactory
 from src.services.recipe_manager import RecipeManager
-from src.database import get_db
+from src.services.meal_planner import MealPlannerService
+from src.database import get_db, run_db
 from src.auth.dependencies import get_current_user
 from src.config.settings import get_settings
 from src.utils.encryption import get_encryption_service
@@ -25,11 +35,124 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["ai"])
 settings = get_settings()
 
+# system key is read once at import rather than from the environ per request
+SYSTEM_API_KEY: Optional[str] = os.getenv('CLAUDE_API_KEY')
+HAS_SYSTEM_KEY: bool = bool(SYSTEM_API_KEY)
+
 # Initialize fallback services
 substitution_engine = SubstitutionEngine()
 knowledge_base = CookingKnowledgeBase()
 meal_plan_templates = MealPlanTemplates()
 
+# canonical SQL strings, so sqlite3's per-connection statement cache
+# (keyed on the exact text) reuses one prepared statement per query
+_SQL_SELECT_USER_KEY = "SELECT claude_api_key_encrypted FROM users WHERE id = ?"
+_SQL_UPDATE_USER_KEY = (
+    "UPDATE users SET claude_api_key_encrypted = ?, updated_at = CURRENT_TIMESTAMP "
+    "WHERE id = ?"
+)
+_SQL_DELETE_USER_KEY = (
+    "UPDATE users SET claude_api_key_encrypted = NULL, updated_at = CURRENT_TIMESTAMP "
+    "WHERE id = ?"
+)
+_SQL_SELECT_USER_PREFS = "SELECT dietary_restrictions, favorite_cuisines FROM users WHERE id = ?"
+_SQL_INSERT_MEAL_PLAN_BATCH = (
+    "INSERT INTO ai_meal_plan_batches "
+    "(batch_id, user_id, days, meal_types_json, save_plan, api_key_encrypted) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_SELECT_MEAL_PLAN_BATCH = (
+    "SELECT days, meal_types_json, save_plan, api_key_encrypted, response_json "
+    "FROM ai_meal_plan_batches WHERE batch_id = ? AND user_id = ?"
+)
+# a claim left by a poll that died mid-save expires, so the batch isn't stuck
+_SQL_CLAIM_MEAL_PLAN_BATCH = (
+    "UPDATE ai_meal_plan_batches SET status = 'collecting', updated_at = CURRENT_TIMESTAMP "
+    "WHERE batch_id = ? AND (status = 'processing' OR "
+    "(status = 'collecting' AND updated_at < datetime('now', '-5 minutes')))"
+)
+_SQL_RELEASE_MEAL_PLAN_BATCH = (
+    "UPDATE ai_meal_plan_batches SET status = 'processing', updated_at = CURRENT_TIMESTAMP "
+    "WHERE batch_id = ? AND status = 'collecting'"
+)
+_SQL_FINISH_MEAL_PLAN_BATCH = (
+    "UPDATE ai_meal_plan_batches SET status = 'ended', response_json = ?, "
+    "updated_at = CURRENT_TIMESTAMP WHERE batch_id = ?"
+)
+
+
+def _fetch_user_row(sql: str, user_id: int) -> Optional[Any]:
+    """run a single-row users query on this thread's own connection (via run_db)"""
+    cursor = get_db(settings.DATABASE_URL).conn.cursor()
+    cursor.execute(sql, (user_id,))
+    return cursor.fetchone()
+
+
+def _write_user_row(sql: str, params: Tuple[Any, ...]) -> None:
+    """run and commit one write (users, batches) on this thread's own connection (via run_db)"""
+    conn = get_db(settings.DATABASE_URL).conn
+    conn.execute(sql, params)
+    conn.commit()
+
+
+def _fetch_meal_plan_batch(batch_id: str, user_id: int) -> Optional[Any]:
+    """load a submitted meal plan batch, only if it belongs to user_id (via run_db)"""
+    cursor = get_db(settings.DATABASE_URL).conn.cursor()
+    cursor.execute(_SQL_SELECT_MEAL_PLAN_BATCH, (batch_id, user_id))
+    return cursor.fetchone()
+
+
+def _claim_meal_plan_batch(batch_id: str) -> bool:
+    """
+    mark a batch as being collected; True only for the one poll (on any
+    worker) that gets to collect and save it (via run_db)
+    """
+    conn = get_db(settings.DATABASE_URL).conn
+    claimed = conn.execute(_SQL_CLAIM_MEAL_PLAN_BATCH, (batch_id,)).rowcount > 0
+    conn.commit()
+    return claimed
+
+
+# user_id -> (expiry, decrypted personal API key or None), so AI calls skip
+# the users lookup and decrypt; set/delete of the key evict it in this
+# process, and the ttl bounds how long other workers serve a stale key
+USER_KEY_CACHE_SIZE = 1024
+USER_KEY_TTL_SECONDS = 300
+_user_key_cache: "OrderedDict[int, Tuple[float, Optional[str]]]" = OrderedDict()
+# bumped on every key change; a lookup that awaited the db across a change
+# doesn't cache what it read, since that row may predate the change
+_user_key_generation = 0
+
+
+def _evict_user_key(user_id: int) -> None:
+    """drop a user's cached key after it changes"""
+    global _user_key_generation
+    _user_key_generation += 1
+    _user_key_cache.pop(user_id, None)
+
+
+# identical AI generations are coalesced: concurrent requests with the same
+# payload on the same API key await one Claude call, and repeats within the
+# ttl reuse its result (except where the caller opts out of reuse)
+AI_RESULT_TTL_SECONDS = 600
+AI_RESULT_CACHE_SIZE = 1024
+_ai_inflight: Dict[str, "asyncio.Future"] = {}
+_ai_results: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+# substitution and cooking answers barely vary between users, so answers
+# paid for by the system key are also kept in redis (when configured) and
+# shared across workers for a day; personal-key answers stay in-process
+AI_SHARED_CACHE_TTL_SECONDS = 86400
+AI_SHARED_CACHE_PREFIX = "aicache:"
+
+# meal slots a saved DayPlan has, in display order
+_MEAL_ORDER = ('breakfast', 'lunch', 'dinner')
+
+
+#request bodies are built eagerly, immutable once validated and trimmed in
+#pydantic-core; extra keys stay ignored so existing clients keep working
+_REQUEST_MODEL_CONFIG = {"frozen": True, "str_strip_whitespace": True, "defer_build": False}
+
 
 class AIRecipeGenerateRequest(BaseModel):
     """request model for AI recipe generation"""
@@ -41,17 +164,23 @@ class AIRecipeGenerateRequest(BaseModel):
     difficulty: Optional[str] = None
     servings: int = Field(default=4, ge=1, le=20)
     save_recipe: bool = False  # Whether to save generated recipe
+    
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class CookingQuestionRequest(BaseModel):
     """request model for cooking Q&A"""
     question: str = Field(..., min_length=5, max_length=500)
     recipe_id: Optional[int] = None  # Optional recipe context
+    
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class UserAPIKeyRequest(BaseModel):
     """request model for setting user API key"""
     api_key: str = Field(..., min_length=20)
+    
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class SubstitutionRequest(BaseModel):
@@ -59,6 +188,8 @@ class SubstitutionRequest(BaseModel):
     ingredient: str
     dietary_restrictions: Optional[List[str]] = None
     recipe_context: Optional[str] = None
+    
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class RecipeModificationRequest(BaseModel):
@@ -67,6 +198,8 @@ class RecipeModificationRequest(BaseModel):
     modification_type: str = Field(..., description="Type: healthier, vegetarian, vegan, gluten-free, low-carb, etc")
     specific_request: Optional[str] = Field(None, description="Specific modification instructions")
     save_as_new: bool = Field(default=True, description="Save as new recipe vs replace original")
+    
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class MealPlanGenerateRequest(BaseModel):
@@ -77,6 +210,9 @@ class MealPlanGenerateRequest(BaseModel):
     calories_target: Optional[int] = Field(None, ge=1000, le=5000)
     meal_types: Optional[List[str]] = Field(default=['breakfast', 'lunch', 'dinner'])
     save_plan: bool = Field(default=False, description="Save generated plan to database")
+    async_mode: bool = Field(default=False, description="Submit as a batch and poll /ai/meal-plan/status/{batch_id}")
+    
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class IngredientPairingRequest(BaseModel):
@@ -84,45 +220,168 @@ class IngredientPairingRequest(BaseModel):
     main_ingredient: str = Field(..., min_length=2)
     cuisine: Optional[str] = None
     meal_type: Optional[str] = None
+    
+    model_config = _REQUEST_MODEL_CONFIG
+
+
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    """encode one server-sent event; json keeps newlines in chunks from ending it"""
+    prefix = f"event: {event}\n".encode() if event else b""
+    return prefix + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+def _sse_response(events) -> StreamingResponse:
+    """wrap an async event generator, disabling proxy buffering"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _ai_request_key(kind: str, claude_client: ClaudeClient, payload: Dict[str, Any]) -> str:
+    """
+    stable hash of an AI call, the API key it is billed to and its
+    canonicalized inputs; calls on different keys never share a result
+    """
+    raw = orjson.dumps([kind, claude_client.key_fingerprint, payload], option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+async def _coalesced_ai_call(
+    key: str,
+    make_call: Callable[[], Awaitable[Any]],
+    reuse_result: bool = True
+) -> Any:
+    """
+    run make_call once per key: serve a fresh cached result, join an
+    in-flight call for the same key, or start the call and share it;
+    with reuse_result=False only in-flight calls are shared
+    """
+    cached = _ai_results.get(key) if reuse_result else None
+    if cached is not None and cached[0] > time.monotonic():
+        _ai_results.move_to_end(key)
+        return cached[1]
+    
+    inflight = _ai_inflight.get(key)
+    while inflight is not None:
+        try:
+            # shield so one waiter disconnecting doesn't cancel the shared call
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # only the leader was cancelled (its client went away): this
+            # request is still wanted, so join or start the next call
+            if not inflight.cancelled() or asyncio.current_task().cancelling():
+                raise
+        inflight = _ai_inflight.get(key)
+    
+    future = asyncio.get_running_loop().create_future()
+    _ai_inflight[key] = future
+    try:
+        result = await make_call()
+    except BaseException as e:
+        if isinstance(e, Exception):
+            future.set_exception(e)
+            future.exception()  # mark retrieved; waiters (if any) still get it
+        else:
+            future.cancel()
+        raise
+    finally:
+        _ai_inflight.pop(key, None)
+    
+    future.set_result(result)
+    if reuse_result:
+        _ai_results[key] = (time.monotonic() + AI_RESULT_TTL_SECONDS, result)
+        if len(_ai_results) > AI_RESULT_CACHE_SIZE:
+            _ai_results.popitem(last=False)
+    return result
+
+
+async def _shared_ai_call(
+    redis,
+    claude_client: ClaudeClient,
+    key: str,
+    make_call: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    _coalesced_ai_call behind a redis tier for system-key calls; redis
+    errors fall through to the in-process path so the cache can never
+    fail a request
+    """
+    if redis is None or not HAS_SYSTEM_KEY or claude_client.api_key != SYSTEM_API_KEY:
+        return await _coalesced_ai_call(key, make_call)
+    
+    redis_key = AI_SHARED_CACHE_PREFIX + key
+    try:
+        cached = await redis.get(redis_key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except Exception as e:
+        logger.error(f"AI cache read failed: {str(e)}")
+    
+    result = await _coalesced_ai_call(key, make_call)
+    try:
+        await redis.setex(redis_key, AI_SHARED_CACHE_TTL_SECONDS, orjson.dumps(result))
+    except Exception as e:
+        logger.error(f"AI cache write failed: {str(e)}")
+    return result
 
 
-def get_claude_client(current_user: UserResponse = Depends(get_current_user)) -> Optional[ClaudeClient]:
+@lru_cache(maxsize=1024)
+def _parse_pref_list(raw: Optional[str]) -> Tuple[str, ...]:
+    """
+    parse a stored json preference list; keyed on the raw column text, so a
+    profile update naturally misses and reparses
+    """
+    return tuple(orjson.loads(raw or '[]'))
+
+
+async def get_claude_client(current_user: UserResponse = Depends(get_current_user)) -> Optional[ClaudeClient]:
     """
     get Claude client for current user
     uses user's API key if available, otherwise system key
     returns None if no API key available (will use fallback systems)
+    async so FastAPI resolves it inline instead of via a threadpool hop;
+    get_db() is a process-wide singleton, nothing is opened per request
     """
-    db = get_db(settings.DATABASE_URL)
-    cursor = db.conn.cursor()
-    
-    # Check if user has their own API key
-    cursor.execute(
-        "SELECT claude_api_key_encrypted FROM users WHERE id = ?",
-        (current_user.id,)
-    )
-    row = cursor.fetchone()
+    cached = _user_key_cache.get(current_user.id)
+    if cached is not None and cached[0] > time.monotonic():
+        _user_key_cache.move_to_end(current_user.id)
+        user_api_key = cached[1]
+    else:
+        # Check if user has their own API key
+        generation = _user_key_generation
+        row = await run_db(_fetch_user_row, _SQL_SELECT_USER_KEY, current_user.id)
+        
+        user_api_key = None
+        if row and row[0]:
+            # User has their own key - decrypt it
+            try:
+                encryption_service = get_encryption_service()
+                user_api_key = encryption_service.decrypt(row[0])
+            except Exception as e:
+                logger.warning(f"Failed to decrypt user API key: {e}")
+                return None
+        
+        if generation == _user_key_generation:
+            _user_key_cache[current_user.id] = (time.monotonic() + USER_KEY_TTL_SECONDS, user_api_key)
+            _user_key_cache.move_to_end(current_user.id)
+            if len(_user_key_cache) > USER_KEY_CACHE_SIZE:
+                _user_key_cache.popitem(last=False)
     
-    if row and row[0]:
-        # User has their own key - decrypt and use it
-        try:
-            encryption_service = get_encryption_service()
-            user_api_key = encryption_service.decrypt(row[0])
-            return ClaudeClientFactory.get_user_client(current_user.id, user_api_key)
-        except Exception as e:
-            logger.warning(f"Failed to decrypt user API key: {e}")
-            return None
+    if user_api_key:
+        return ClaudeClientFactory.get_user_client(current_user.id, user_api_key)
     
     # Use system API key
-    system_api_key = os.getenv('CLAUDE_API_KEY')
-    if not system_api_key:
+    if not HAS_SYSTEM_KEY:
         # No API key available - will use fallback systems
         return None
     
-    return ClaudeClientFactory.get_system_client(system_api_key)
+    return ClaudeClientFactory.get_system_client(SYSTEM_API_KEY)
 
 
-def get_recipe_manager() -> RecipeManager:
-    """dependency to get recipe manager"""
+async def get_recipe_manager() -> RecipeManager:
+    """dependency to get recipe manager (async: resolved inline, no threadpool hop)"""
     db = get_db(settings.DATABASE_URL)
     return RecipeManager(db.conn)
 
@@ -154,30 +413,43 @@ async def generate_recipe(
                 detail="Either ingredients or description must be provided"
             )
         
-        # Generate recipe using Claude
+        # Generate recipe using Claude (identical concurrent requests share one
+        # call; results aren't reused, so asking again gives a new recipe)
         if request.ingredients:
-            recipe_data = await claude_client.generate_recipe_from_ingredients(
-                ingredients=request.ingredients,
-                dietary_restrictions=request.dietary_restrictions,
-                cuisine=request.cuisine,
-                meal_type=request.meal_type,
-                difficulty=request.difficulty
+            recipe_data = await _coalesced_ai_call(
+                _ai_request_key("recipe_from_ingredients", claude_client, request.model_dump(
+                    include={"ingredients", "dietary_restrictions", "cuisine", "meal_type", "difficulty"}
+                )),
+                lambda: claude_client.generate_recipe_from_ingredients(
+                    ingredients=request.ingredients,
+                    dietary_restrictions=request.dietary_restrictions,
+                    cuisine=request.cuisine,
+                    meal_type=request.meal_type,
+                    difficulty=request.difficulty
+                ),
+                reuse_result=False
             )
         else:
-            recipe_data = await claude_client.generate_recipe_from_description(
-                description=request.description,
-                dietary_restrictions=request.dietary_restrictions,
-                servings=request.servings
+            recipe_data = await _coalesced_ai_call(
+                _ai_request_key("recipe_from_description", claude_client, request.model_dump(
+                    include={"description", "dietary_restrictions", "servings"}
+                )),
+                lambda: claude_client.generate_recipe_from_description(
+                    description=request.description,
+                    dietary_restrictions=request.dietary_restrictions,
+                    servings=request.servings
+                ),
+                reuse_result=False
             )
         
-        logger.info(f"Generated recipe for user {current_user.id}: {recipe_data.get('title')}")
+        logger.info("Generated recipe for user %s: %s", current_user.id, recipe_data.get('title'))
         
         # Save recipe if requested
         saved_recipe = None
         if request.save_recipe:
             try:
                 # Convert to RecipeCreate model
-                recipe_create = RecipeCreate(**recipe_data)
+                recipe_create = RecipeCreate.model_validate(recipe_data)
                 saved_recipe = await recipe_manager.create_recipe(recipe_create, current_user.id)
                 
                 return {
@@ -213,9 +485,78 @@ async def generate_recipe(
         )
 
 
+@router.post("/ai/generate-recipe/stream")
+async def generate_recipe_stream(
+    request: AIRecipeGenerateRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    claude_client: Optional[ClaudeClient] = Depends(get_claude_client),
+    recipe_manager: RecipeManager = Depends(get_recipe_manager)
+):
+    """
+    generate a recipe using AI, streamed as server-sent events
+    emits {"text": ...} chunks as Claude writes them, then a "done" event with
+    the parsed recipe (saved when save_recipe is set) or an "error" event
+    """
+    if not claude_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Recipe generation requires AI. Please set up your Claude API key."
+        )
+    
+    if not request.ingredients and not request.description:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either ingredients or description must be provided"
+        )
+    
+    if request.ingredients:
+        chunks = claude_client.stream_recipe_from_ingredients(
+            ingredients=request.ingredients,
+            dietary_restrictions=request.dietary_restrictions,
+            cuisine=request.cuisine,
+            meal_type=request.meal_type,
+            difficulty=request.difficulty
+        )
+    else:
+        chunks = claude_client.stream_recipe_from_description(
+            description=request.description,
+            dietary_restrictions=request.dietary_restrictions,
+            servings=request.servings
+        )
+    
+    async def events():
+        # buffer the text so the full recipe can be parsed (and saved) at the end
+        buffered = []
+        try:
+            async for text in chunks:
+                buffered.append(text)
+                yield _sse({"text": text})
+            recipe_data = claude_client.parse_recipe("".join(buffered))
+        except Exception as e:
+            logger.error(f"Error streaming recipe: {e}")
+            yield _sse({"detail": "Error generating recipe with AI"}, event="error")
+            return
+        
+        logger.info("Streamed recipe for user %s: %s", current_user.id, recipe_data.get('title'))
+        
+        result = {"recipe": recipe_data, "saved": False}
+        if request.save_recipe:
+            try:
+                recipe_create = RecipeCreate.model_validate(recipe_data)
+                saved_recipe = await recipe_manager.create_recipe(recipe_create, current_user.id)
+                result.update(saved=True, recipe_id=saved_recipe.id)
+            except Exception as e:
+                logger.error(f"Error saving generated recipe: {e}")
+        
+        yield _sse(result, event="done")
+    
+    return _sse_response(events())
+
+
 @router.post("/ai/ask-cooking", response_model=Dict[str, Any])
 async def ask_cooking_question(
     request: CookingQuestionRequest,
+    http_request: Request,
     current_user: UserResponse = Depends(get_current_user),
     claude_client: Optional[ClaudeClient] = Depends(get_claude_client),
     recipe_manager: RecipeManager = Depends(get_recipe_manager)
@@ -234,18 +575,28 @@ async def ask_cooking_question(
             if recipe:
                 recipe_context = {
                     "title": recipe.title,
-                    "ingredients": [ing.model_dump() for ing in recipe.ingredients],
+                    "ingredients": recipe_ingredient_list_adapter.dump_python(recipe.ingredients),
                     "instructions": recipe.instructions
                 }
         
         # Try AI first if available
         if claude_client:
-            answer = await claude_client.answer_cooking_question(
-                question=request.question,
-                recipe_context=recipe_context
+            # exact-match cache on the normalized question and recipe, so
+            # "How long to rest steak?" and "how long to rest steak" share one
+            answer = await _shared_ai_call(
+                getattr(http_request.app.state, "redis", None),
+                claude_client,
+                _ai_request_key("cooking_answer", claude_client, {
+                    "question": " ".join(request.question.lower().split()),
+                    "recipe_context": recipe_context
+                }),
+                lambda: claude_client.answer_cooking_question(
+                    question=request.question,
+                    recipe_context=recipe_context
+                )
             )
             
-            logger.info(f"Answered cooking question with AI for user {current_user.id}")
+            logger.info("Answered cooking question with AI for user %s", current_user.id)
             
             return {
                 "question": request.question,
@@ -282,7 +633,7 @@ async def ask_cooking_question(
                     "message": "No matching answer found. Set up Claude API key for AI-powered answers."
                 }
         
-        logger.info(f"Answered cooking question with knowledge base for user {current_user.id}")
+        logger.info("Answered cooking question with knowledge base for user %s", current_user.id)
         
         return {
             "question": request.question,
@@ -300,9 +651,59 @@ async def ask_cooking_question(
         )
 
 
+@router.post("/ai/ask-cooking/stream")
+async def ask_cooking_question_stream(
+    request: CookingQuestionRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    claude_client: Optional[ClaudeClient] = Depends(get_claude_client),
+    recipe_manager: RecipeManager = Depends(get_recipe_manager)
+):
+    """
+    ask a cooking-related question, streamed as server-sent events
+    emits {"text": ...} chunks then a "done" event naming the source;
+    without AI the knowledge base answer is sent as a single chunk
+    """
+    recipe_context = None
+    if request.recipe_id:
+        recipe = await recipe_manager.get_recipe(request.recipe_id, current_user.id)
+        if recipe:
+            recipe_context = {
+                "title": recipe.title,
+                "ingredients": recipe_ingredient_list_adapter.dump_python(recipe.ingredients),
+                "instructions": recipe.instructions
+            }
+    
+    async def events():
+        if not claude_client:
+            answer = knowledge_base.get_answer(request.question)
+            if not answer:
+                results = knowledge_base.search(request.question)
+                answer = results[0]["answer"] if results else "I couldn't find a specific answer to your question in the knowledge base."
+            yield _sse({"text": answer})
+            yield _sse({"source": "knowledge_base"}, event="done")
+            return
+        
+        try:
+            async for text in claude_client.stream_cooking_answer(
+                question=request.question,
+                recipe_context=recipe_context
+            ):
+                yield _sse({"text": text})
+        except Exception as e:
+            logger.error(f"Error streaming cooking answer: {e}")
+            yield _sse({"detail": "Error answering question"}, event="error")
+            return
+        
+        logger.info("Streamed cooking answer with AI for user %s", current_user.id)
+        yield _sse({"source": "ai"}, event="done")
+    
+    return _sse_response(events())
+
+
 @router.post("/ai/suggest-substitution", response_model=Dict[str, Any])
 async def suggest_ai_substitution(
     request: SubstitutionRequest,
+    http_request: Request,
     current_user: UserResponse = Depends(get_current_user),
     claude_client: Optional[ClaudeClient] = Depends(get_claude_client)
 ):
@@ -313,13 +714,22 @@ async def suggest_ai_substitution(
     try:
         # Try AI first if available
         if claude_client:
-            substitutions = await claude_client.suggest_substitutions(
-                ingredient=request.ingredient,
-                dietary_restrictions=request.dietary_restrictions,
-                recipe_context=request.recipe_context
+            substitutions = await _shared_ai_call(
+                getattr(http_request.app.state, "redis", None),
+                claude_client,
+                _ai_request_key("substitutions", claude_client, {
+                    "ingredient": request.ingredient.lower(),
+                    "dietary_restrictions": sorted({d.lower() for d in request.dietary_restrictions or ()}),
+                    "recipe_context": request.recipe_context
+                }),
+                lambda: claude_client.suggest_substitutions(
+                    ingredient=request.ingredient,
+                    dietary_restrictions=request.dietary_restrictions,
+                    recipe_context=request.recipe_context
+                )
             )
             
-            logger.info(f"Suggested AI substitutions for '{request.ingredient}' for user {current_user.id}")
+            logger.info("Suggested AI substitutions for '%s' for user %s", request.ingredient, current_user.id)
             
             return {
                 "ingredient": request.ingredient,
@@ -343,7 +753,7 @@ async def suggest_ai_substitution(
                 "supported_ingredients": substitution_engine.get_supported_ingredients()[:20]  # Show some examples
             }
         
-        logger.info(f"Suggested rule-based substitutions for '{request.ingredient}' for user {current_user.id}")
+        logger.info("Suggested rule-based substitutions for '%s' for user %s", request.ingredient, current_user.id)
         
         return {
             "ingredient": request.ingredient,
@@ -365,41 +775,35 @@ async def suggest_ai_substitution(
 @router.post("/ai/api-key", status_code=status.HTTP_204_NO_CONTENT)
 async def set_user_api_key(
     request: UserAPIKeyRequest,
+    background: BackgroundTasks,
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
     set user's personal Claude API key
     the key is encrypted before storage
     """
+    # Validate API key format (basic check) before touching encryption or the db
+    if not request.api_key.startswith('sk-ant-'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Claude API key format"
+        )
+    
     try:
-        # Validate API key format (basic check)
-        if not request.api_key.startswith('sk-ant-'):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid Claude API key format"
-            )
-        
         # Encrypt API key
         encryption_service = get_encryption_service()
         encrypted_key = encryption_service.encrypt(request.api_key)
         
         # Store encrypted key
-        db = get_db(settings.DATABASE_URL)
-        cursor = db.conn.cursor()
-        cursor.execute("""
-            UPDATE users 
-            SET claude_api_key_encrypted = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (encrypted_key, current_user.id))
-        db.conn.commit()
-        
-        # Clear cached client
+        await run_db(_write_user_row, _SQL_UPDATE_USER_KEY, (encrypted_key, current_user.id))
+        
+        # Clear cached client and key now so no request reuses the old key;
+        # only the log line waits until the 204 has been sent
         ClaudeClientFactory.clear_user_client(current_user.id)
+        _evict_user_key(current_user.id)
         
-        logger.info(f"User {current_user.id} set their Claude API key")
+        background.add_task(logger.info, "User %s set their Claude API key", current_user.id)
         
-    except HTTPException:
-        raise
     except Exception as e:
         logger.error(f"Error setting user API key: {e}")
         raise HTTPException(
@@ -410,6 +814,7 @@ async def set_user_api_key(
 
 @router.delete("/ai/api-key", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user_api_key(
+    background: BackgroundTasks,
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
@@ -417,19 +822,13 @@ async def delete_user_api_key(
     user will fall back to system API key if available
     """
     try:
-        db = get_db(settings.DATABASE_URL)
-        cursor = db.conn.cursor()
-        cursor.execute("""
-            UPDATE users 
-            SET claude_api_key_encrypted = NULL, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (current_user.id,))
-        db.conn.commit()
-        
-        # Clear cached client
+        await run_db(_write_user_row, _SQL_DELETE_USER_KEY, (current_user.id,))
+        
+        # Clear cached client and key now; the log line runs after the response
         ClaudeClientFactory.clear_user_client(current_user.id)
+        _evict_user_key(current_user.id)
         
-        logger.info(f"User {current_user.id} deleted their Claude API key")
+        background.add_task(logger.info, "User %s deleted their Claude API key", current_user.id)
         
     except Exception as e:
         logger.error(f"Error deleting user API key: {e}")
@@ -447,16 +846,10 @@ async def get_api_key_status(
     check if user has API key configured and if system key is available
     """
     try:
-        db = get_db(settings.DATABASE_URL)
-        cursor = db.conn.cursor()
-        cursor.execute(
-            "SELECT claude_api_key_encrypted FROM users WHERE id = ?",
-            (current_user.id,)
-        )
-        row = cursor.fetchone()
+        row = await run_db(_fetch_user_row, _SQL_SELECT_USER_KEY, current_user.id)
         
         has_user_key = bool(row and row[0])
-        has_system_key = bool(os.getenv('CLAUDE_API_KEY'))
+        has_system_key = HAS_SYSTEM_KEY
         
         return {
             "has_user_key": has_user_key,
@@ -507,7 +900,7 @@ async def modify_recipe(
         # Prepare recipe data for modification
         recipe_data = {
             'title': original_recipe.title,
-            'ingredients': [ing.model_dump() for ing in original_recipe.ingredients],
+            'ingredients': recipe_ingredient_list_adapter.dump_python(original_recipe.ingredients),
             'instructions': original_recipe.instructions,
             'servings': original_recipe.servings
         }
@@ -519,14 +912,13 @@ async def modify_recipe(
             specific_request=request.specific_request
         )
         
-        logger.info(f"Modified recipe {request.recipe_id} for user {current_user.id}: {request.modification_type}")
+        logger.info("Modified recipe %s for user %s: %s", request.recipe_id, current_user.id, request.modification_type)
         
         # Save as new recipe if requested
         saved_recipe = None
         if request.save_as_new:
             try:
-                from src.models.recipe import RecipeCreate
-                recipe_create = RecipeCreate(**modified_recipe_data)
+                recipe_create = RecipeCreate.model_validate(modified_recipe_data)
                 saved_recipe = await recipe_manager.create_recipe(recipe_create, current_user.id)
                 
                 return {
@@ -567,39 +959,151 @@ async def modify_recipe(
         )
 
 
+async def _save_generated_meal_plan(
+    meal_plan_data: Dict[str, Any],
+    days: int,
+    meal_types: Optional[List[str]],
+    user_id: int,
+    recipe_manager: RecipeManager
+) -> Dict[str, Any]:
+    """save a generated plan's recipes and the plan itself; returns the response body"""
+    try:
+        # same connection as the request's recipe manager
+        meal_planner = MealPlannerService(recipe_manager.conn)
+        
+        # First, validate every meal recipe, then save them in one transaction
+        start_date = date.today()
+        planned_meals = []  # (day_index, DayMeal without its recipe id yet)
+        recipe_creates = []
+        
+        # the plannable meal types that were requested, resolved once for all days
+        requested_meal_types = frozenset(meal_types or ())
+        saved_meal_types = [t for t in _MEAL_ORDER if t in requested_meal_types]
+        
+        for day_index, day_info in enumerate(meal_plan_data.get('days', [])):
+            meals = day_info.get('meals', {})
+            
+            for meal_type in saved_meal_types:
+                if meal_type in meals:
+                    meal_recipe_data = meals[meal_type]
+                    
+                    try:
+                        recipe_create = RecipeCreate.model_validate(meal_recipe_data)
+                        day_meal = DayMeal(
+                            meal_type=meal_type,
+                            recipe_id=0,
+                            servings=meal_recipe_data.get('servings', 1.0)
+                        )
+                        recipe_creates.append(recipe_create)
+                        planned_meals.append((day_index, day_meal))
+                    except Exception as e:
+                        logger.warning(f"Could not save {meal_type} recipe: {e}")
+        
+        recipe_ids = await recipe_manager.create_recipes_bulk(recipe_creates, user_id)
+        
+        meals_by_day: Dict[int, Dict[str, DayMeal]] = {}
+        for (day_index, day_meal), recipe_id in zip(planned_meals, recipe_ids):
+            day_meal.recipe_id = recipe_id
+            meals_by_day.setdefault(day_index, {})[day_meal.meal_type] = day_meal
+        
+        # DayMeals were validated above and the dates are ours, so skip revalidating them
+        days_data = [
+            DayPlan.model_construct(
+                date=start_date + timedelta(days=day_index),
+                breakfast=day_meals.get('breakfast'),
+                lunch=day_meals.get('lunch'),
+                dinner=day_meals.get('dinner')
+            )
+            for day_index, day_meals in sorted(meals_by_day.items())
+        ]
+        
+        # Create meal plan
+        if days_data:
+            meal_plan_create = MealPlanCreate(
+                name=meal_plan_data.get('meal_plan_name', f"{days}-Day AI Plan"),
+                start_date=start_date,
+                end_date=start_date + timedelta(days=days - 1),
+                days=days_data
+            )
+            
+            saved_plan = await meal_planner.create_meal_plan(meal_plan_create, user_id)
+            
+            return {
+                "meal_plan": meal_plan_data,
+                "saved": True,
+                "meal_plan_id": saved_plan.id,
+                "message": "Meal plan generated and saved successfully"
+            }
+
+    except Exception as e:
+        logger.error(f"Error saving meal plan: {e}")
+        return {
+            "meal_plan": meal_plan_data,
+            "saved": False,
+            "message": "Meal plan generated but could not be saved"
+        }
+    
+    return {
+        "meal_plan": meal_plan_data,
+        "saved": False,
+        "message": "Meal plan generated successfully"
+    }
+
+
 @router.post("/ai/generate-meal-plan", response_model=Dict[str, Any])
 async def generate_ai_meal_plan(
     request: MealPlanGenerateRequest,
     current_user: UserResponse = Depends(get_current_user),
-    claude_client: Optional[ClaudeClient] = Depends(get_claude_client)
+    claude_client: Optional[ClaudeClient] = Depends(get_claude_client),
+    recipe_manager: RecipeManager = Depends(get_recipe_manager)
 ):
     """
     generate a meal plan
     uses AI if available, otherwise uses pre-designed templates
     """
     try:
-        # Get user's dietary preferences if not provided
-        db = get_db(settings.DATABASE_URL)
-        cursor = db.conn.cursor()
-        cursor.execute(
-            "SELECT dietary_restrictions, favorite_cuisines FROM users WHERE id = ?",
-            (current_user.id,)
-        )
-        row = cursor.fetchone()
-        
         dietary_restrictions = request.dietary_restrictions
         cuisine_preferences = request.cuisine_preferences
         
-        # Use user preferences if not explicitly provided
-        if row and not dietary_restrictions:
-            import json
-            user_restrictions = json.loads(row['dietary_restrictions'] or '[]')
-            dietary_restrictions = user_restrictions if user_restrictions else None
+        # Get user's dietary preferences only if the request leaves any out
+        if not dietary_restrictions or not cuisine_preferences:
+            row = await run_db(_fetch_user_row, _SQL_SELECT_USER_PREFS, current_user.id)
+            
+            # Use user preferences if not explicitly provided
+            if row and not dietary_restrictions:
+                user_restrictions = _parse_pref_list(row['dietary_restrictions'])
+                dietary_restrictions = list(user_restrictions) if user_restrictions else None
+            
+            if row and not cuisine_preferences:
+                user_cuisines = _parse_pref_list(row['favorite_cuisines'])
+                cuisine_preferences = list(user_cuisines) if user_cuisines else None
         
-        if row and not cuisine_preferences:
-            import json
-            user_cuisines = json.loads(row['favorite_cuisines'] or '[]')
-            cuisine_preferences = user_cuisines if user_cuisines else None
+        # Batched generation: submit one request per meal and return right away
+        if claude_client and request.async_mode:
+            batch_id = await claude_client.submit_meal_plan_batch(
+                days=request.days,
+                dietary_restrictions=dietary_restrictions,
+                cuisine_preferences=cuisine_preferences,
+                calories_target=request.calories_target,
+                meal_types=request.meal_types
+            )
+            
+            # stored in the db so any worker can answer polls, and with the
+            # submitting key since a batch can only be read by its own key
+            api_key_encrypted = None
+            if not HAS_SYSTEM_KEY or claude_client.api_key != SYSTEM_API_KEY:
+                api_key_encrypted = get_encryption_service().encrypt(claude_client.api_key)
+            await run_db(_write_user_row, _SQL_INSERT_MEAL_PLAN_BATCH, (
+                batch_id, current_user.id, request.days, orjson.dumps(request.meal_types).decode(),
+                request.save_plan, api_key_encrypted
+            ))
+            
+            logger.info("Submitted AI %s-day meal plan batch %s for user %s", request.days, batch_id, current_user.id)
+            return {
+                "batch_id": batch_id,
+                "status": "processing",
+                "message": "Meal plan submitted; poll /ai/meal-plan/status/{batch_id} for the result"
+            }
         
         # Try AI first if available
         if claude_client:
@@ -612,7 +1116,7 @@ async def generate_ai_meal_plan(
                 meal_types=request.meal_types
             )
             
-            logger.info(f"Generated AI {request.days}-day meal plan for user {current_user.id}")
+            logger.info("Generated AI %s-day meal plan for user %s", request.days, current_user.id)
             meal_plan_data["source"] = "ai"
             meal_plan_data["message"] = "AI-generated meal plan"
         else:
@@ -631,7 +1135,7 @@ async def generate_ai_meal_plan(
                 dietary_restrictions=dietary_restrictions
             )
             
-            logger.info(f"Generated template-based {request.days}-day meal plan for user {current_user.id}")
+            logger.info("Generated template-based %s-day meal plan for user %s", request.days, current_user.id)
             meal_plan_data["source"] = "template"
             meal_plan_data["message"] = "Template-based meal plan (AI not available). For custom AI-generated plans, set up Claude API key."
             
@@ -640,76 +1144,9 @@ async def generate_ai_meal_plan(
         
         # Save meal plan if requested
         if request.save_plan:
-            try:
-                from datetime import date, timedelta
-                from src.models.meal_plan import MealPlanCreate, DayPlan, DayMeal
-                from src.services.meal_planner import MealPlannerService
-                from src.models.recipe import RecipeCreate
-                
-                meal_planner = MealPlannerService(db.conn)
-                recipe_manager = RecipeManager(db.conn)
-                
-                # First, save all recipes and collect recipe IDs
-                start_date = date.today()
-                days_data = []
-                
-                for day_index, day_info in enumerate(meal_plan_data.get('days', [])):
-                    day_date = start_date + timedelta(days=day_index)
-                    meals = day_info.get('meals', {})
-                    
-                    day_meals = {}
-                    
-                    # Save each meal as a recipe
-                    for meal_type in ['breakfast', 'lunch', 'dinner']:
-                        if meal_type in meals and meal_type in request.meal_types:
-                            meal_recipe_data = meals[meal_type]
-                            
-                            # Create and save recipe
-                            try:
-                                recipe_create = RecipeCreate(**meal_recipe_data)
-                                saved_meal = await recipe_manager.create_recipe(recipe_create, current_user.id)
-                                
-                                day_meals[meal_type] = DayMeal(
-                                    meal_type=meal_type,
-                                    recipe_id=saved_meal.id,
-                                    servings=meal_recipe_data.get('servings', 1.0)
-                                )
-                            except Exception as e:
-                                logger.warning(f"Could not save {meal_type} recipe: {e}")
-                    
-                    if day_meals:
-                        days_data.append(DayPlan(
-                            date=day_date,
-                            breakfast=day_meals.get('breakfast'),
-                            lunch=day_meals.get('lunch'),
-                            dinner=day_meals.get('dinner')
-                        ))
-                
-                # Create meal plan
-                if days_data:
-                    meal_plan_create = MealPlanCreate(
-                        name=meal_plan_data.get('meal_plan_name', f"{request.days}-Day AI Plan"),
-                        start_date=start_date,
-                        end_date=start_date + timedelta(days=request.days - 1),
-                        days=days_data
-                    )
-                    
-                    saved_plan = await meal_planner.create_meal_plan(meal_plan_create, current_user.id)
-                    
-                    return {
-                        "meal_plan": meal_plan_data,
-                        "saved": True,
-                        "meal_plan_id": saved_plan.id,
-                        "message": "Meal plan generated and saved successfully"
-                    }
-            
-            except Exception as e:
-                logger.error(f"Error saving meal plan: {e}")
-                return {
-                    "meal_plan": meal_plan_data,
-                    "saved": False,
-                    "message": "Meal plan generated but could not be saved"
-                }
+            return await _save_generated_meal_plan(
+                meal_plan_data, request.days, request.meal_types, current_user.id, recipe_manager
+            )
         
         return {
             "meal_plan": meal_plan_data,
@@ -730,6 +1167,90 @@ async def generate_ai_meal_plan(
         )
 
 
+@router.get("/ai/meal-plan/status/{batch_id}", response_model=Dict[str, Any])
+async def get_ai_meal_plan_status(
+    batch_id: str,
+    current_user: UserResponse = Depends(get_current_user),
+    recipe_manager: RecipeManager = Depends(get_recipe_manager)
+):
+    """
+    get the result of a meal plan submitted with async_mode
+    returns status "processing" until the batch ends, then the meal plan
+    (saved on the first completed poll if save_plan was requested)
+    """
+    row = await run_db(_fetch_meal_plan_batch, batch_id, current_user.id)
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Meal plan batch not found"
+        )
+    
+    if row['response_json']:
+        return orjson.loads(row['response_json'])
+    
+    # results are read with the key that submitted the batch, not the poller's current one;
+    # that key may since have been replaced, so its client is built for this poll only
+    # rather than cached in the factory (whose entries are per user and key prefix)
+    if row['api_key_encrypted']:
+        try:
+            api_key = get_encryption_service().decrypt(row['api_key_encrypted'])
+        except Exception as e:
+            logger.warning(f"Failed to decrypt meal plan batch API key: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Meal plan batch credentials are no longer readable"
+            )
+        claude_client = ClaudeClient(api_key, http_client=ClaudeClientFactory.get_http_client())
+    elif HAS_SYSTEM_KEY:
+        claude_client = ClaudeClientFactory.get_system_client(SYSTEM_API_KEY)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Meal plan status requires AI. Please set up your Claude API key."
+        )
+    
+    days = row['days']
+    try:
+        meal_plan_data = await claude_client.get_meal_plan_batch(batch_id, days)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=str(e)
+        )
+    
+    if meal_plan_data is None:
+        return {"batch_id": batch_id, "status": "processing"}
+    
+    # one poll (on any worker) collects and saves; the others keep seeing
+    # "processing" until its response is stored
+    if not await run_db(_claim_meal_plan_batch, batch_id):
+        return {"batch_id": batch_id, "status": "processing"}
+    
+    try:
+        meal_plan_data["source"] = "ai"
+        meal_plan_data["message"] = "AI-generated meal plan"
+        
+        if row['save_plan']:
+            response = await _save_generated_meal_plan(
+                meal_plan_data, days, orjson.loads(row['meal_types_json']), current_user.id, recipe_manager
+            )
+        else:
+            response = {
+                "meal_plan": meal_plan_data,
+                "saved": False,
+                "message": "Meal plan generated successfully"
+            }
+        
+        response.update(batch_id=batch_id, status="ended")
+        await run_db(_write_user_row, _SQL_FINISH_MEAL_PLAN_BATCH, (orjson.dumps(response).decode(), batch_id))
+    except BaseException:
+        await asyncio.shield(run_db(_write_user_row, _SQL_RELEASE_MEAL_PLAN_BATCH, (batch_id,)))
+        raise
+    
+    logger.info("Collected AI meal plan batch %s for user %s", batch_id, current_user.id)
+    return response
+
+
 @router.post("/ai/ingredient-pairings", response_model=Dict[str, Any])
 async def get_ingredient_pairings(
     request: IngredientPairingRequest,
@@ -749,13 +1270,16 @@ async def get_ingredient_pairings(
                 detail="Ingredient pairing suggestions require AI. Please set up your Claude API key to use this feature."
             )
         
-        pairings = await claude_client.suggest_ingredient_pairings(
-            main_ingredient=request.main_ingredient,
-            cuisine=request.cuisine,
-            meal_type=request.meal_type
+        pairings = await _coalesced_ai_call(
+            _ai_request_key("pairings", claude_client, request.model_dump()),
+            lambda: claude_client.suggest_ingredient_pairings(
+                main_ingredient=request.main_ingredient,
+                cuisine=request.cuisine,
+                meal_type=request.meal_type
+            )
         )
         
-        logger.info(f"Suggested pairings for '{request.main_ingredient}' for user {current_user.id}")
+        logger.info("Suggested pairings for '%s' for user %s", request.main_ingredient, current_user.id)
         
         return {
             "main_ingredient": request.main_ingredient,
@@ -21,8 +21,8 @@ router = APIRouter(tags=["meal_plans"])
 settings = get_settings()
 
 
-def get_meal_planner() -> MealPlannerService:
-    """dependency to get meal planner service"""
+async def get_meal_planner() -> MealPlannerService:
+    """dependency to get meal planner service (async: resolved inline, no threadpool hop)"""
     db = get_db(settings.DATABASE_URL)
     return MealPlannerService(db.conn)
 
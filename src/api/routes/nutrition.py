@@ -4,12 +4,15 @@ handles nutrition calculation and analysis for recipes and meal plans
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
+import asyncio
 import logging
+import orjson
 
 from src.models.user import UserResponse
-from src.core.nutrition_calculator import NutritionCalculator
-from src.database import get_db
+from src.core.nutrition_calculator import NutritionCalculator, NutritionInfo
+from src.database import get_db, run_db
 from src.auth.dependencies import get_current_user, get_current_user_optional
 from src.config.settings import get_settings
 from pydantic import BaseModel
@@ -35,11 +38,108 @@ class MealPlanNutritionRequest(BaseModel):
     meal_plan_id: int
 
 
+@lru_cache(maxsize=1)
 def get_nutrition_calculator() -> NutritionCalculator:
-    """dependency to get nutrition calculator"""
+    """dependency to get nutrition calculator (shared, its tables never change)"""
     return NutritionCalculator()
 
 
+def _ingredient_texts(ingredients_json: str) -> List[str]:
+    """convert stored ingredient json to the text lines the calculator parses"""
+    return [
+        f"{ing['quantity']} {ing.get('unit', '')} {ing['name']}".strip() if ing.get('quantity') else ing['name']
+        for ing in orjson.loads(ingredients_json)
+    ]
+
+
+#the calculator is deterministic, so results are memoized on the stored column
+#text: editing a recipe's ingredients or servings naturally misses the cache.
+#cached values are shared across requests and must be treated as read-only
+@lru_cache(maxsize=1024)
+def _recipe_analysis(calculator: NutritionCalculator, ingredients_json: str, servings: int) -> Dict[str, Any]:
+    """full nutrition analysis for a stored recipe"""
+    return calculator.analyze_recipe_nutrition({
+        'ingredients': _ingredient_texts(ingredients_json),
+        'servings': servings
+    })
+
+
+@lru_cache(maxsize=1024)
+def _recipe_total_nutrition(calculator: NutritionCalculator, ingredients_json: str, servings: int):
+    """total (whole-recipe) nutrition for a stored recipe"""
+    return calculator.calculate_recipe_nutrition({
+        'ingredients': _ingredient_texts(ingredients_json),
+        'servings': servings
+    })
+
+
+def _meal_plan_total_nutrition(calculator: NutritionCalculator, recipe_rows) -> Tuple[NutritionInfo, int]:
+    """sum nutrition over a plan's recipes (runs on a worker thread)"""
+    total_nutrition = NutritionInfo()
+    recipe_count = 0
+    
+    for recipe_row in recipe_rows:
+        recipe_nutrition = _recipe_total_nutrition(
+            calculator, recipe_row['ingredients_json'], recipe_row['servings']
+        )
+        total_nutrition = total_nutrition + recipe_nutrition
+        recipe_count += 1
+    
+    return total_nutrition, recipe_count
+
+
+def _fetch_recipe_row(recipe_id: int):
+    """load a recipe's ingredients/servings (runs on a worker thread via run_db)"""
+    cursor = get_db(settings.DATABASE_URL).conn.cursor()
+    cursor.execute("""
+        SELECT ingredients_json, servings, nutrition_json
+        FROM recipes
+        WHERE id = ? AND is_deleted = 0
+    """, (recipe_id,))
+    return cursor.fetchone()
+
+
+def _fetch_meal_plan_rows(meal_plan_id: int, user_id: int):
+    """
+    load a meal plan and all of its recipes (runs on a worker thread via run_db)
+    returns (plan_row, recipe_rows), plan_row is None if the plan isn't the user's
+    """
+    cursor = get_db(settings.DATABASE_URL).conn.cursor()
+    cursor.execute("""
+        SELECT meals_json, start_date, end_date
+        FROM meal_plans
+        WHERE id = ? AND user_id = ?
+    """, (meal_plan_id, user_id))
+    
+    row = cursor.fetchone()
+    if not row:
+        return None, []
+    
+    #collect all recipe ids
+    meals = orjson.loads(row['meals_json'])
+    recipe_ids = set()
+    for day_meals in meals.values():
+        for meal_type in ['breakfast', 'lunch', 'dinner']:
+            if meal_type in day_meals:
+                recipe_ids.add(day_meals[meal_type]['recipe_id'])
+        if 'snacks' in day_meals:
+            for snack in day_meals['snacks']:
+                recipe_ids.add(snack['recipe_id'])
+    
+    if not recipe_ids:
+        return row, []
+    
+    #one query for every recipe in the plan
+    placeholders = ",".join("?" * len(recipe_ids))
+    cursor.execute(f"""
+        SELECT ingredients_json, servings
+        FROM recipes
+        WHERE id IN ({placeholders}) AND is_deleted = 0
+    """, tuple(recipe_ids))
+    
+    return row, cursor.fetchall()
+
+
 @router.post("/nutrition/analyze", response_model=Dict[str, Any])
 async def analyze_nutrition(
     analysis_request: NutritionAnalysisRequest,
@@ -55,7 +155,8 @@ async def analyze_nutrition(
             'servings': analysis_request.servings
         }
         
-        analysis = calculator.analyze_recipe_nutrition(recipe_data)
+        #cpu-bound ingredient parsing runs off the event loop
+        analysis = await asyncio.to_thread(calculator.analyze_recipe_nutrition, recipe_data)
         
         logger.info(f"analyzed nutrition for {len(analysis_request.ingredients)} ingredients")
         return analysis
@@ -79,41 +180,17 @@ async def get_recipe_nutrition(
     includes stored nutrition data plus calculated analysis
     """
     try:
-        db = get_db(settings.DATABASE_URL)
-        cursor = db.conn.cursor()
-        
         #get recipe
-        cursor.execute("""
-            SELECT ingredients_json, servings, nutrition_json
-            FROM recipes
-            WHERE id = ? AND is_deleted = 0
-        """, (recipe_id,))
-        
-        row = cursor.fetchone()
+        row = await run_db(_fetch_recipe_row, recipe_id)
         if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="recipe not found"
             )
         
-        import json
-        ingredients = json.loads(row['ingredients_json'])
-        servings = row['servings']
-        
-        #convert ingredients to text format for calculator
-        ingredient_texts = []
-        for ing in ingredients:
-            text = ing['name']
-            if ing.get('quantity'):
-                text = f"{ing['quantity']} {ing.get('unit', '')} {text}".strip()
-            ingredient_texts.append(text)
-        
-        recipe_data = {
-            'ingredients': ingredient_texts,
-            'servings': servings
-        }
-        
-        analysis = calculator.analyze_recipe_nutrition(recipe_data)
+        analysis = await asyncio.to_thread(
+            _recipe_analysis, calculator, row['ingredients_json'], row['servings']
+        )
         
         logger.info(f"analyzed nutrition for recipe {recipe_id}")
         return analysis
@@ -139,70 +216,20 @@ async def get_meal_plan_nutrition(
     aggregates nutrition across all meals in the plan
     """
     try:
-        db = get_db(settings.DATABASE_URL)
-        cursor = db.conn.cursor()
-        
-        #get meal plan
-        cursor.execute("""
-            SELECT meals_json, start_date, end_date
-            FROM meal_plans
-            WHERE id = ? AND user_id = ?
-        """, (meal_plan_id, current_user.id))
-        
-        row = cursor.fetchone()
+        #get meal plan and its recipes
+        row, recipe_rows = await run_db(_fetch_meal_plan_rows, meal_plan_id, current_user.id)
         if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="meal plan not found"
             )
         
-        import json
-        from src.core.nutrition_calculator import NutritionInfo
-        
-        meals = json.loads(row['meals_json'])
-        
-        #collect all recipe ids
-        recipe_ids = set()
-        for day_meals in meals.values():
-            for meal_type in ['breakfast', 'lunch', 'dinner']:
-                if meal_type in day_meals:
-                    recipe_ids.add(day_meals[meal_type]['recipe_id'])
-            if 'snacks' in day_meals:
-                for snack in day_meals['snacks']:
-                    recipe_ids.add(snack['recipe_id'])
-        
-        #get all recipes and their nutrition
-        total_nutrition = NutritionInfo()
-        recipe_count = 0
-        
-        for recipe_id in recipe_ids:
-            cursor.execute("""
-                SELECT ingredients_json, servings
-                FROM recipes
-                WHERE id = ? AND is_deleted = 0
-            """, (recipe_id,))
-            
-            recipe_row = cursor.fetchone()
-            if recipe_row:
-                ingredients = json.loads(recipe_row['ingredients_json'])
-                servings = recipe_row['servings']
-                
-                #convert ingredients to text
-                ingredient_texts = []
-                for ing in ingredients:
-                    text = ing['name']
-                    if ing.get('quantity'):
-                        text = f"{ing['quantity']} {ing.get('unit', '')} {text}".strip()
-                    ingredient_texts.append(text)
-                
-                recipe_data = {
-                    'ingredients': ingredient_texts,
-                    'servings': servings
-                }
-                
-                recipe_nutrition = calculator.calculate_recipe_nutrition(recipe_data)
-                total_nutrition = total_nutrition + recipe_nutrition
-                recipe_count += 1
+        #get all recipes and their nutrition; the ingredient parsing is cpu-bound,
+        #so it runs off the event loop (one thread for the plan: the gil would
+        #serialize per-recipe threads anyway)
+        total_nutrition, recipe_count = await asyncio.to_thread(
+            _meal_plan_total_nutrition, calculator, recipe_rows
+        )
         
         #calculate per-day averages
         from datetime import datetime
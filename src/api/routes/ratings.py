@@ -21,8 +21,8 @@ router = APIRouter(tags=["ratings"])
 settings = get_settings()
 
 
-def get_rating_manager() -> RatingManager:
-    """dependency to get rating manager"""
+async def get_rating_manager() -> RatingManager:
+    """dependency to get rating manager (async: resolved inline, no threadpool hop)"""
     db = get_db(settings.DATABASE_URL)
     return RatingManager(db.conn)
 
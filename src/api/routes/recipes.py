@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
 import logging
+import orjson
 
 from src.models.recipe import (
     RecipeCreate, RecipeUpdate, RecipeResponse, RecipeSummary,
-    RecipeSearch, RecipeImportUrl, DifficultyLevel
+    RecipeSearch, RecipeImportUrl, DifficultyLevel, recipe_summary_list_adapter
 )
 from src.models.user import UserResponse
 from src.services.recipe_scraper import RecipeScraperService
@@ -19,18 +21,22 @@ router = APIRouter(tags=["recipes"])
 settings = get_settings()
 
 
-def get_recipe_manager() -> RecipeManager:
-    """dependency to get recipe manager"""
+async def get_recipe_manager() -> RecipeManager:
+    """dependency to get recipe manager (async: resolved inline, no threadpool hop)"""
     db = get_db(settings.DATABASE_URL)
     return RecipeManager(db.conn)
 
 
-def get_recipe_scraper() -> RecipeScraperService:
-    return RecipeScraperService()
+async def get_recipe_scraper(request: Request) -> RecipeScraperService:
+    return RecipeScraperService(getattr(request.app.state, "http", None))
 
 
-def get_external_recipe_service() -> ExternalRecipeService:
-    return ExternalRecipeService()
+#stateless, so one instance serves every request
+_external_recipe_service = ExternalRecipeService()
+
+
+async def get_external_recipe_service() -> ExternalRecipeService:
+    return _external_recipe_service
 
 
 @router.post("/recipes/import", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
@@ -283,17 +289,22 @@ async def search_recipes(
             except Exception as e:
                 logger.error(f"error fetching external recipes: {e}")
         
-        all_recipes = recipes + external_recipes
+        #summaries are already validated, dump them once instead of via response_model;
+        #without external results the adapter's json bytes are spliced in as-is
+        if external_recipes:
+            all_recipes = recipe_summary_list_adapter.dump_python(recipes, mode="json") + external_recipes
+        else:
+            all_recipes = orjson.Fragment(recipe_summary_list_adapter.dump_json(recipes))
         total_count = total + len(external_recipes)
         
-        return {
+        return ORJSONResponse(content={
             "recipes": all_recipes,
             "total": total_count,
             "limit": limit,
             "offset": offset,
             "has_more": (offset + limit) < total,
             "external_count": len(external_recipes)
-        }
+        })
         
     except Exception as e:
         logger.error(f"error searching recipes: {e}")
@@ -378,13 +389,13 @@ async def get_my_favorites(
             current_user.id, limit, offset
         )
         
-        return {
-            "recipes": recipes,
+        return ORJSONResponse(content={
+            "recipes": orjson.Fragment(recipe_summary_list_adapter.dump_json(recipes)),
             "total": total,
             "limit": limit,
             "offset": offset,
             "has_more": (offset + limit) < total
-        }
+        })
         
     except Exception as e:
         logger.error(f"error getting favorites: {e}")
@@ -4,6 +4,7 @@ provides intelligent recipe recommendations
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional, Dict
 import logging
 
@@ -18,6 +19,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter(tags=["recommendations"])
 settings = get_settings()
 
+#handlers build plain dicts, so they return ORJSONResponse directly and skip the
+#List[Dict] response_model pass (the declaration stays for the openapi schema)
+
 
 class RecommendByIngredientsRequest(BaseModel):
     """request model for ingredient-based recommendations"""
@@ -25,8 +29,8 @@ class RecommendByIngredientsRequest(BaseModel):
     limit: int = 10
 
 
-def get_recommendation_service() -> RecommendationService:
-    """dependency to get recommendation service"""
+async def get_recommendation_service() -> RecommendationService:
+    """dependency to get recommendation service (async: resolved inline, no threadpool hop)"""
     db = get_db(settings.DATABASE_URL)
     return RecommendationService(db.conn)
 
@@ -50,7 +54,7 @@ async def get_personalized_recommendations(
         )
         
         logger.info(f"generated {len(recommendations)} recommendations for user {current_user.id}")
-        return recommendations
+        return ORJSONResponse(content=recommendations)
         
     except Exception as e:
         logger.error(f"error generating recommendations: {e}")
@@ -83,7 +87,7 @@ async def get_similar_recipes(
             )
         
         logger.info(f"found {len(recommendations)} similar recipes for recipe {recipe_id}")
-        return recommendations
+        return ORJSONResponse(content=recommendations)
         
     except HTTPException:
         raise
@@ -117,7 +121,7 @@ async def recommend_by_ingredients(
         )
         
         logger.info(f"found {len(recommendations)} recipes for {len(request.ingredients)} ingredients")
-        return recommendations
+        return ORJSONResponse(content=recommendations)
         
     except HTTPException:
         raise
@@ -159,7 +163,7 @@ async def recommend_by_pantry(
         )
         
         logger.info(f"found {len(recommendations)} recipes for user's pantry ({len(pantry_items)} items)")
-        return recommendations
+        return ORJSONResponse(content=recommendations)
         
     except Exception as e:
         logger.error(f"error recommending by pantry: {e}")
@@ -186,7 +190,7 @@ async def get_trending_recipes(
         )
         
         logger.info(f"retrieved {len(recommendations)} trending recipes")
-        return recommendations
+        return ORJSONResponse(content=recommendations)
         
     except Exception as e:
         logger.error(f"error getting trending recipes: {e}")
@@ -241,7 +245,7 @@ async def get_quick_recipes(
             })
         
         logger.info(f"found {len(results)} quick recipes (max {max_time} minutes)")
-        return results
+        return ORJSONResponse(content=results)
         
     except Exception as e:
         logger.error(f"error getting quick recipes: {e}")
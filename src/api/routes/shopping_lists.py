@@ -22,8 +22,8 @@ router = APIRouter(tags=["shopping_lists"])
 settings = get_settings()
 
 
-def get_shopping_list_service() -> ShoppingListService:
-    """dependency to get shopping list service"""
+async def get_shopping_list_service() -> ShoppingListService:
+    """dependency to get shopping list service (async: resolved inline, no threadpool hop)"""
     db = get_db(settings.DATABASE_URL)
     return ShoppingListService(db.conn)
 
@@ -4,6 +4,7 @@ suggests intelligent substitutions based on dietary needs and pantry availabilit
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from functools import lru_cache
 from typing import List, Optional, Dict
 import logging
 
@@ -40,8 +41,9 @@ class SubstitutionResponse(BaseModel):
     pantry_priority: Optional[List[str]] = None
 
 
+@lru_cache(maxsize=1)
 def get_substitution_engine() -> SubstitutionEngine:
-    """dependency to get substitution engine"""
+    """dependency to get substitution engine (one instance per process)"""
     return SubstitutionEngine()
 
 
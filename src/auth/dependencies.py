@@ -19,9 +19,13 @@ security = HTTPBearer()
 security_optional = HTTPBearer(auto_error=False)
 
 
-def get_auth_handler() -> AuthHandler:
-    """dependency to get auth handler"""
-    return AuthHandler()
+#stateless (token + password helpers only), so one instance is shared
+_auth_handler = AuthHandler()
+
+
+async def get_auth_handler() -> AuthHandler:
+    """dependency to get auth handler (async: resolved inline, no threadpool hop)"""
+    return _auth_handler
 
 
 async def get_current_user(
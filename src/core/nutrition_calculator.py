@@ -11,6 +11,18 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Ingredient amount patterns, compiled once and tried in order.
+# The flag marks the "pinch/handful" form, which has no numeric amount.
+_AMOUNT_PATTERNS = [
+    # "2 cups flour" or "1.5 tbsp oil" (also covers "1/2 cup sugar")
+    (re.compile(r'^(\d+(?:\.\d+)?(?:/\d+)?)\s*(\w+)?\s+(.+)$', re.IGNORECASE), False),
+    # "2-3 cloves garlic"
+    (re.compile(r'^(\d+)-\d+\s*(\w+)?\s+(.+)$', re.IGNORECASE), False),
+    # "a pinch of salt" or "handful of nuts"
+    (re.compile(r'^(?:a\s+)?(?:pinch|handful|dash|splash)\s+(?:of\s+)?(.+)$', re.IGNORECASE), True),
+]
+_LEADING_NUMBER_RE = re.compile(r'^(\d+(?:\.\d+)?(?:/\d+)?)')
+
 @dataclass
 class NutritionInfo:
     """Nutritional information for a recipe or meal"""
@@ -449,22 +461,10 @@ class NutritionCalculator:
         # Clean the text
         ingredient_text = ingredient_text.strip()
         
-        # Regular expressions for different patterns
-        patterns = [
-            # "2 cups flour" or "1.5 tbsp oil" 
-            r'^(\d+(?:\.\d+)?(?:/\d+)?)\s*(\w+)?\s+(.+)$',
-            # "1/2 cup sugar"
-            r'^(\d+/\d+)\s*(\w+)?\s+(.+)$',
-            # "2-3 cloves garlic"
-            r'^(\d+)-\d+\s*(\w+)?\s+(.+)$',
-            # "a pinch of salt" or "handful of nuts"
-            r'^(?:a\s+)?(?:pinch|handful|dash|splash)\s+(?:of\s+)?(.+)$'
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, ingredient_text, re.IGNORECASE)
+        for pattern, is_pinch in _AMOUNT_PATTERNS:
+            match = pattern.match(ingredient_text)
             if match:
-                if 'pinch' in pattern or 'handful' in pattern:
+                if is_pinch:
                     # Special case for "pinch", "handful", etc.
                     return 0.1, '', match.group(1).strip()
                 else:
@@ -480,7 +480,7 @@ class NutritionCalculator:
                     return amount, unit.lower() if unit else '', ingredient.strip()
         
         # If no pattern matches, look for numbers at the beginning
-        number_match = re.match(r'^(\d+(?:\.\d+)?(?:/\d+)?)', ingredient_text)
+        number_match = _LEADING_NUMBER_RE.match(ingredient_text)
         if number_match:
             amount_str = number_match.group(1)
             remaining = ingredient_text[len(amount_str):].strip()
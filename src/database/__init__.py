@@ -3,7 +3,7 @@ Database package for Recipe Assistant
 Handles all database operations and management
 """
 
-from .db_manager import DatabaseManager, get_db
+from .db_manager import DatabaseManager, get_db, run_db
 
-__all__ = ['DatabaseManager', 'get_db']
+__all__ = ['DatabaseManager', 'get_db', 'run_db']
 
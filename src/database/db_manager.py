@@ -3,13 +3,14 @@ Database Manager for Recipe Assistant
 Handles SQLite database connections, operations, and management
 """
 
+import asyncio
 import sqlite3
 import json
 import logging
 import threading
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Dict, List, Any, Tuple
+from typing import Optional, Dict, List, Any, Tuple, Callable
 from datetime import datetime, timedelta
 import shutil
 
@@ -56,13 +57,25 @@ class DatabaseManager:
             self._local.connection = sqlite3.connect(
                 str(self.db_path),
                 check_same_thread=False,
-                timeout=30.0
+                timeout=30.0,
+                # default is 128; hot queries are canonical module constants,
+                # so a bigger cache keeps them all prepared
+                cached_statements=512
             )
             self._local.connection.row_factory = sqlite3.Row
             # Enable foreign keys
             self._local.connection.execute("PRAGMA foreign_keys = ON")
             # Enable WAL mode for better concurrency
             self._local.connection.execute("PRAGMA journal_mode = WAL")
+            # Read-heavy tuning; these are per-connection so they are set
+            # here, once per thread, rather than at app startup
+            for pragma in (
+                "synchronous = NORMAL",       # fsync at checkpoints only, safe under WAL
+                "mmap_size = 268435456",      # 256MB memory-mapped reads
+                "cache_size = -65536",        # 64MB page cache
+                "temp_store = MEMORY",
+            ):
+                self._local.connection.execute(f"PRAGMA {pragma}")
         
         return self._local.connection
     
@@ -109,11 +122,48 @@ class DatabaseManager:
         with open(schema_file, 'r', encoding='utf-8') as f:
             schema_sql = f.read()
         
+        had_ingredient_index = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'recipe_ingredients_fts'"
+        ).fetchone() is not None
+        
         with self.get_cursor() as cursor:
             cursor.executescript(schema_sql)
         
+        self._upgrade_recipes_fts(schema_sql)
+        if not had_ingredient_index:
+            # new index on an existing database: fill it from the current recipes
+            # (contentless, so there's no 'rebuild'; the triggers keep it current)
+            with self.get_cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO recipe_ingredients_fts(rowid, names) "
+                    "SELECT id, names FROM recipe_ingredient_names"
+                )
+        
         logger.info("Database schema initialized successfully")
     
+    def _upgrade_recipes_fts(self, schema_sql: str):
+        """
+        Rebuild recipes_fts on databases created with its old UPDATE/DELETE
+        triggers, which leave stale tokens in an external-content table
+        """
+        trigger = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'recipes_au'"
+        ).fetchone()
+        if trigger and "'delete'" in trigger[0]:
+            return
+        
+        logger.info("Rebuilding recipes_fts")
+        with self.get_cursor() as cursor:
+            cursor.executescript("""
+                DROP TRIGGER IF EXISTS recipes_ai;
+                DROP TRIGGER IF EXISTS recipes_ad;
+                DROP TRIGGER IF EXISTS recipes_au;
+                DROP TABLE IF EXISTS recipes_fts;
+            """)
+            # schema.sql recreates the table and triggers with the current layout
+            cursor.executescript(schema_sql)
+            cursor.execute("INSERT INTO recipes_fts(recipes_fts) VALUES ('rebuild')")
+    
     # ========== USER OPERATIONS ==========
     
     def create_user(self, email: str, password_hash: str, full_name: Optional[str] = None) -> int:
@@ -706,3 +756,15 @@ def get_db(db_path: str = "data/recipe_assistant.db") -> DatabaseManager:
         _db_instance = DatabaseManager(db_path)
     return _db_instance
 
+
+# Blocking queries issued from async routes run on worker threads, each using
+# its own thread-local connection; the semaphore keeps them from taking every
+# default-executor thread
+DB_THREAD_LIMIT = 8
+_db_thread_slots = asyncio.Semaphore(DB_THREAD_LIMIT)
+
+
+async def run_db(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking database helper off the event loop, bounded by DB_THREAD_LIMIT"""
+    async with _db_thread_slots:
+        return await asyncio.to_thread(fn, *args)
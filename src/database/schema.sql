@@ -72,15 +72,54 @@ CREATE TRIGGER IF NOT EXISTS recipes_ai AFTER INSERT ON recipes BEGIN
 END;
 
 CREATE TRIGGER IF NOT EXISTS recipes_ad AFTER DELETE ON recipes BEGIN
-    DELETE FROM recipes_fts WHERE rowid = old.id;
+    INSERT INTO recipes_fts(recipes_fts, rowid, title, description, cuisine)
+    VALUES ('delete', old.id, old.title, old.description, old.cuisine);
 END;
 
 CREATE TRIGGER IF NOT EXISTS recipes_au AFTER UPDATE ON recipes BEGIN
-    UPDATE recipes_fts 
-    SET title = new.title, 
-        description = new.description,
-        cuisine = new.cuisine
-    WHERE rowid = new.id;
+    INSERT INTO recipes_fts(recipes_fts, rowid, title, description, cuisine)
+    VALUES ('delete', old.id, old.title, old.description, old.cuisine);
+    INSERT INTO recipes_fts(rowid, title, description, cuisine)
+    VALUES (new.id, new.title, new.description, new.cuisine);
+END;
+
+--plain-text ingredient names per recipe (json keys and quantities left out)
+CREATE VIEW IF NOT EXISTS recipe_ingredient_names AS
+SELECT r.id, (
+    SELECT group_concat(
+        CASE j.type WHEN 'object' THEN json_extract(j.value, '$.name') WHEN 'text' THEN j.value END,
+        ' '
+    )
+    FROM json_each(CASE WHEN json_valid(r.ingredients_json) THEN r.ingredients_json ELSE '[]' END) AS j
+) AS names
+FROM recipes r;
+
+--full-text index of ingredient names, so ingredient filters are postings lookups;
+--contentless (only rowids come back) and fed from the view by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS recipe_ingredients_fts USING fts5(
+    names,
+    content=''
+);
+
+--old names are read through the view before the row changes, new ones after
+CREATE TRIGGER IF NOT EXISTS recipe_ingredients_ai AFTER INSERT ON recipes BEGIN
+    INSERT INTO recipe_ingredients_fts(rowid, names)
+    SELECT id, names FROM recipe_ingredient_names WHERE id = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipe_ingredients_bd BEFORE DELETE ON recipes BEGIN
+    INSERT INTO recipe_ingredients_fts(recipe_ingredients_fts, rowid, names)
+    SELECT 'delete', id, names FROM recipe_ingredient_names WHERE id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipe_ingredients_bu BEFORE UPDATE OF ingredients_json ON recipes BEGIN
+    INSERT INTO recipe_ingredients_fts(recipe_ingredients_fts, rowid, names)
+    SELECT 'delete', id, names FROM recipe_ingredient_names WHERE id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS recipe_ingredients_au AFTER UPDATE OF ingredients_json ON recipes BEGIN
+    INSERT INTO recipe_ingredients_fts(rowid, names)
+    SELECT id, names FROM recipe_ingredient_names WHERE id = new.id;
 END;
 
 --recipe tags (for categorization and filtering)
@@ -280,6 +319,23 @@ CREATE TABLE IF NOT EXISTS user_nutrition_goals (
 
 CREATE INDEX IF NOT EXISTS idx_nutrition_goals_user ON user_nutrition_goals(user_id);
 
+--ai meal plans submitted as message batches (async_mode), awaiting collection
+CREATE TABLE IF NOT EXISTS ai_meal_plan_batches (
+    batch_id TEXT PRIMARY KEY, --anthropic message batch id
+    user_id INTEGER NOT NULL,
+    days INTEGER NOT NULL,
+    meal_types_json TEXT NOT NULL, --json array of requested meal types
+    save_plan BOOLEAN DEFAULT 0,
+    api_key_encrypted TEXT, --submitting personal key; NULL means the system key
+    status TEXT DEFAULT 'processing', --'processing', 'collecting', 'ended'
+    response_json TEXT, --final response body once collected
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_meal_plan_batches_user ON ai_meal_plan_batches(user_id);
+
 --database metadata and migrations
 CREATE TABLE IF NOT EXISTS schema_migrations (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
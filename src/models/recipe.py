@@ -2,7 +2,7 @@
 recipe-related pydantic models
 """
 
-from pydantic import BaseModel, Field, HttpUrl, field_validator, model_validator
+from pydantic import BaseModel, Field, HttpUrl, TypeAdapter, field_validator, model_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -204,3 +204,10 @@ class RecipeSummary(BaseModel):
     
     model_config = {"from_attributes": True}
 
+
+#compiled once so list endpoints can serialize summaries without a response_model pass
+recipe_summary_list_adapter = TypeAdapter(List[RecipeSummary])
+
+#dumps a whole ingredient list in one pydantic-core call instead of per-model model_dump
+recipe_ingredient_list_adapter = TypeAdapter(List[RecipeIngredient])
+
@@ -4,28 +4,46 @@ Handles communication with Anthropic's Claude API for AI-powered features
 """
 
 import anthropic
+import hashlib
+import httpx
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 from datetime import datetime, timedelta
 import json
 
 logger = logging.getLogger(__name__)
 
+# one pooled connection set to api.anthropic.com shared by every client, so
+# TLS sessions and keep-alive sockets survive across requests and users
+CLAUDE_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=100, max_connections=200)
+CLAUDE_HTTP_TIMEOUT = 60.0
+
 
 class ClaudeClient:
     """Claude API client with rate limiting and error handling"""
     
-    def __init__(self, api_key: str, model: str = "claude-3-5-sonnet-20241022"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-3-5-sonnet-20241022",
+        http_client: Optional[anthropic.DefaultAsyncHttpxClient] = None
+    ):
         """
         Initialize Claude client
         
         Args:
             api_key: Anthropic API key
             model: Claude model to use
+            http_client: Shared connection pool (see ClaudeClientFactory)
         """
         self.api_key = api_key
         self.model = model
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # identifies the billed credential without carrying the key itself
+        self.key_fingerprint = hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest()
+        self.async_client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            http_client=http_client
+        )
         
         # Rate limiting (simple in-memory for now)
         self.last_request_time = None
@@ -126,6 +144,46 @@ class ClaudeClient:
             logger.error(f"Error answering cooking question: {e}")
             raise
     
+    def stream_recipe_from_ingredients(
+        self,
+        ingredients: List[str],
+        dietary_restrictions: Optional[List[str]] = None,
+        cuisine: Optional[str] = None,
+        meal_type: Optional[str] = None,
+        difficulty: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a generated recipe as raw text chunks
+        
+        Same prompt as generate_recipe_from_ingredients; join the chunks and
+        pass them to parse_recipe for the structured recipe.
+        """
+        prompt = self._build_recipe_generation_prompt(
+            ingredients, dietary_restrictions, cuisine, meal_type, difficulty
+        )
+        return self._stream_api_call(prompt, max_tokens=2000)
+    
+    def stream_recipe_from_description(
+        self,
+        description: str,
+        dietary_restrictions: Optional[List[str]] = None,
+        servings: int = 4
+    ) -> AsyncIterator[str]:
+        """Stream a recipe generated from a description as raw text chunks"""
+        prompt = self._build_description_prompt(
+            description, dietary_restrictions, servings
+        )
+        return self._stream_api_call(prompt, max_tokens=2000)
+    
+    def stream_cooking_answer(
+        self,
+        question: str,
+        recipe_context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Stream the answer to a cooking question as text chunks"""
+        prompt = self._build_qa_prompt(question, recipe_context)
+        return self._stream_api_call(prompt, max_tokens=1000)
+    
     async def suggest_substitutions(
         self,
         ingredient: str,
@@ -226,6 +284,109 @@ class ClaudeClient:
             logger.error(f"Error generating meal plan: {e}")
             raise
     
+    async def submit_meal_plan_batch(
+        self,
+        days: int,
+        dietary_restrictions: Optional[List[str]] = None,
+        cuisine_preferences: Optional[List[str]] = None,
+        calories_target: Optional[int] = None,
+        meal_types: Optional[List[str]] = None
+    ) -> str:
+        """
+        Submit a meal plan as one Message Batch, one request per meal
+        
+        Batched requests are billed at a discount and run off the
+        interactive rate limit; poll get_meal_plan_batch for the result.
+        
+        Args:
+            days: Number of days to plan for
+            dietary_restrictions: Optional dietary restrictions
+            cuisine_preferences: Optional cuisine preferences
+            calories_target: Optional daily calorie target
+            meal_types: Which meals to include (breakfast, lunch, dinner, snacks)
+            
+        Returns:
+            Anthropic message batch id
+        """
+        meal_types = meal_types or ['breakfast', 'lunch', 'dinner']
+        
+        requests = [
+            {
+                "custom_id": f"day{day}-{meal_type}",
+                "params": {
+                    "model": self.model,
+                    "max_tokens": 1500,
+                    "messages": [{
+                        "role": "user",
+                        "content": self._build_meal_prompt(
+                            day, days, meal_type, dietary_restrictions,
+                            cuisine_preferences, calories_target, len(meal_types)
+                        )
+                    }]
+                }
+            }
+            for day in range(1, days + 1)
+            for meal_type in meal_types
+        ]
+        
+        try:
+            batch = await self.async_client.messages.batches.create(requests=requests)
+            logger.info(f"Submitted meal plan batch {batch.id} with {len(requests)} requests")
+            return batch.id
+            
+        except anthropic.APIError as e:
+            logger.error(f"Claude API error: {e}")
+            raise ValueError(f"Claude API error: {str(e)}")
+    
+    async def get_meal_plan_batch(self, batch_id: str, days: int) -> Optional[Dict[str, Any]]:
+        """
+        Collect a meal plan submitted with submit_meal_plan_batch
+        
+        Args:
+            batch_id: Anthropic message batch id
+            days: Number of days the plan was submitted for
+            
+        Returns:
+            Meal plan data in the same shape as generate_meal_plan, or None
+            while the batch is still processing
+        """
+        try:
+            batch = await self.async_client.messages.batches.retrieve(batch_id)
+            if batch.processing_status != "ended":
+                return None
+            
+            plan_days = [{"day": day, "meals": {}} for day in range(1, days + 1)]
+            failed = 0
+            
+            async for entry in await self.async_client.messages.batches.results(batch_id):
+                day_part, _, meal_type = entry.custom_id.partition("-")
+                day = int(day_part[3:])
+                
+                if entry.result.type != "succeeded":
+                    failed += 1
+                    continue
+                
+                try:
+                    recipe = self._parse_recipe_response(entry.result.message.content[0].text)
+                except ValueError:
+                    failed += 1
+                    continue
+                
+                if 1 <= day <= days:
+                    plan_days[day - 1]["meals"][meal_type] = recipe
+            
+            if failed:
+                logger.warning(f"Meal plan batch {batch_id}: {failed} meal(s) failed")
+            
+            return {
+                "meal_plan_name": f"{days}-Day AI Plan",
+                "days": plan_days
+            }
+            
+        except anthropic.APIError as e:
+            logger.error(f"Claude API error: {e}")
+            raise ValueError(f"Claude API error: {str(e)}")
+    
     async def suggest_ingredient_pairings(
         self,
         main_ingredient: str,
@@ -281,7 +442,7 @@ class ClaudeClient:
                 await asyncio.sleep(wait_time)
         
         try:
-            message = self.client.messages.create(
+            message = await self.async_client.messages.create(
                 model=self.model,
                 max_tokens=max_tokens,
                 temperature=temperature,
@@ -306,6 +467,56 @@ class ClaudeClient:
             logger.error(f"Unexpected error calling Claude API: {e}")
             raise
     
+    async def _stream_api_call(
+        self,
+        prompt: str,
+        max_tokens: int = 1024,
+        temperature: float = 1.0
+    ) -> AsyncIterator[str]:
+        """
+        Stream an API call to Claude, yielding text deltas as they arrive
+        
+        Args:
+            prompt: The prompt to send
+            max_tokens: Maximum tokens in response
+            temperature: Sampling temperature
+            
+        Yields:
+            Response text chunks
+        """
+        # Simple rate limiting
+        if self.last_request_time:
+            time_since_last = datetime.now() - self.last_request_time
+            if time_since_last < self.min_request_interval:
+                wait_time = (self.min_request_interval - time_since_last).total_seconds()
+                import asyncio
+                await asyncio.sleep(wait_time)
+        
+        try:
+            async with self.async_client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                
+                message = await stream.get_final_message()
+            
+            self.last_request_time = datetime.now()
+            
+            logger.info(f"Claude API stream complete. Tokens used: {message.usage.input_tokens + message.usage.output_tokens}")
+            
+        except anthropic.APIError as e:
+            logger.error(f"Claude API error: {e}")
+            raise ValueError(f"Claude API error: {str(e)}")
+        except Exception as e:
+            logger.error(f"Unexpected error streaming from Claude API: {e}")
+            raise
+    
     def _build_recipe_generation_prompt(
         self,
         ingredients: List[str],
@@ -450,6 +661,10 @@ etc."""
         
         return prompt
     
+    def parse_recipe(self, response: str) -> Dict[str, Any]:
+        """Parse a complete (e.g. joined streamed) recipe response"""
+        return self._parse_recipe_response(response)
+    
     def _parse_recipe_response(self, response: str) -> Dict[str, Any]:
         """Parse Claude's recipe response into structured format"""
         
@@ -622,6 +837,47 @@ Ensure variety across days and balanced nutrition."""
         
         return prompt
     
+    def _build_meal_prompt(
+        self,
+        day: int,
+        days: int,
+        meal_type: str,
+        dietary_restrictions: Optional[List[str]],
+        cuisine_preferences: Optional[List[str]],
+        calories_target: Optional[int],
+        meals_per_day: int
+    ) -> str:
+        """Build prompt for a single meal of a batched meal plan"""
+        
+        prompt = f"""You are a professional meal planning assistant. Create the {meal_type} recipe for day {day} of a {days}-day meal plan.
+
+Requirements:
+"""
+        
+        if dietary_restrictions:
+            prompt += f"- Dietary restrictions: {', '.join(dietary_restrictions)}\n"
+        
+        if cuisine_preferences:
+            # rotate cuisines by day so independently generated meals still vary
+            prompt += f"- Cuisine: {cuisine_preferences[(day - 1) % len(cuisine_preferences)]}\n"
+        
+        if calories_target:
+            prompt += f"- Target calories: approximately {calories_target // meals_per_day}\n"
+        
+        prompt += """
+Format your response as a JSON object with this structure:
+{
+  "title": "Recipe Name",
+  "ingredients": [{"name": "ingredient", "quantity": 1, "unit": "cup"}],
+  "instructions": ["Step 1", "Step 2"],
+  "prep_time_minutes": 10,
+  "cook_time_minutes": 15,
+  "servings": 2,
+  "estimated_calories": 400
+}"""
+        
+        return prompt
+    
     def _build_pairing_prompt(
         self,
         main_ingredient: str,
@@ -712,12 +968,24 @@ class ClaudeClientFactory:
     
     _system_client: Optional[ClaudeClient] = None
     _user_clients: Dict[str, ClaudeClient] = {}
+    _http_client: Optional[anthropic.DefaultAsyncHttpxClient] = None
+    
+    @classmethod
+    def get_http_client(cls) -> anthropic.DefaultAsyncHttpxClient:
+        """Get or create the connection pool shared by all Claude clients"""
+        if cls._http_client is None or cls._http_client.is_closed:
+            # the SDK's client subclass keeps its tcp keepalive socket options
+            cls._http_client = anthropic.DefaultAsyncHttpxClient(
+                limits=CLAUDE_HTTP_LIMITS,
+                timeout=CLAUDE_HTTP_TIMEOUT
+            )
+        return cls._http_client
     
     @classmethod
     def get_system_client(cls, api_key: str) -> ClaudeClient:
         """Get or create system-wide Claude client"""
         if not cls._system_client or cls._system_client.api_key != api_key:
-            cls._system_client = ClaudeClient(api_key)
+            cls._system_client = ClaudeClient(api_key, http_client=cls.get_http_client())
         return cls._system_client
     
     @classmethod
@@ -726,7 +994,7 @@ class ClaudeClientFactory:
         cache_key = f"{user_id}:{api_key[:8]}"  # Use partial key for cache
         
         if cache_key not in cls._user_clients:
-            cls._user_clients[cache_key] = ClaudeClient(api_key)
+            cls._user_clients[cache_key] = ClaudeClient(api_key, http_client=cls.get_http_client())
         
         return cls._user_clients[cache_key]
     
@@ -736,4 +1004,12 @@ class ClaudeClientFactory:
         keys_to_remove = [k for k in cls._user_clients.keys() if k.startswith(f"{user_id}:")]
         for key in keys_to_remove:
             del cls._user_clients[key]
-
+    
+    @classmethod
+    async def aclose(cls):
+        """Close the shared connection pool and drop cached clients"""
+        cls._system_client = None
+        cls._user_clients.clear()
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+            cls._http_client = None
@@ -10,6 +10,7 @@ from datetime import datetime
 from src.models.rating import (
     RatingCreate, RatingUpdate, RatingResponse, RatingSummary
 )
+from src.services.recommendation_service import invalidate_recommendation_cache
 
 logger = logging.getLogger(__name__)
 
@@ -89,6 +90,7 @@ class RatingManager:
                 logger.info(f"created rating {rating_id} for recipe {recipe_id}")
             
             self.conn.commit()
+            invalidate_recommendation_cache()
             
             #fetch and return rating
             return await self.get_rating(rating_id)
@@ -263,6 +265,7 @@ class RatingManager:
             #delete rating
             cursor.execute("DELETE FROM recipe_ratings WHERE id = ?", (rating_id,))
             self.conn.commit()
+            invalidate_recommendation_cache()
             
             logger.info(f"deleted rating {rating_id}")
             return True
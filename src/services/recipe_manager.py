@@ -12,9 +12,28 @@ from src.models.recipe import (
     RecipeCreate, RecipeUpdate, RecipeResponse, RecipeSummary,
     RecipeSearch, RecipeIngredient, RecipeNutrition
 )
+from src.services.recommendation_service import invalidate_recommendation_cache
 
 logger = logging.getLogger(__name__)
 
+_INSERT_RECIPE_SQL = """
+    INSERT INTO recipes (
+        title, description, source_url, source_name,
+        ingredients_json, instructions_json, nutrition_json,
+        image_url, prep_time_minutes, cook_time_minutes,
+        total_time_minutes, servings, difficulty, cuisine,
+        created_by, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _fts_ingredient_match(ingredient: str) -> Optional[str]:
+    """fts5 query matching ingredient as a word-prefix phrase in the ingredient names"""
+    if not any(ch.isalnum() for ch in ingredient):
+        return None
+    phrase = ingredient.lower().replace('"', '""')
+    return f'names : "{phrase}"*'
+
 
 class RecipeManager:
     """manages recipe database operations"""
@@ -39,61 +58,20 @@ class RecipeManager:
             created recipe with id
         """
         try:
-            #serialize json fields
-            ingredients_json = json.dumps([ing.model_dump() for ing in recipe_data.ingredients])
-            instructions_json = json.dumps(recipe_data.instructions)
-            nutrition_json = json.dumps(recipe_data.nutrition.model_dump()) if recipe_data.nutrition else None
-            
-            #calculate total time
-            total_time = None
-            if recipe_data.prep_time_minutes and recipe_data.cook_time_minutes:
-                total_time = recipe_data.prep_time_minutes + recipe_data.cook_time_minutes
-            elif recipe_data.prep_time_minutes:
-                total_time = recipe_data.prep_time_minutes
-            elif recipe_data.cook_time_minutes:
-                total_time = recipe_data.cook_time_minutes
-            
             #insert recipe
             cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO recipes (
-                    title, description, source_url, source_name,
-                    ingredients_json, instructions_json, nutrition_json,
-                    image_url, prep_time_minutes, cook_time_minutes,
-                    total_time_minutes, servings, difficulty, cuisine,
-                    created_by, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                recipe_data.title,
-                recipe_data.description,
-                str(recipe_data.source_url) if recipe_data.source_url else None,
-                recipe_data.source_name,
-                ingredients_json,
-                instructions_json,
-                nutrition_json,
-                str(recipe_data.image_url) if recipe_data.image_url else None,
-                recipe_data.prep_time_minutes,
-                recipe_data.cook_time_minutes,
-                total_time,
-                recipe_data.servings,
-                recipe_data.difficulty.value if recipe_data.difficulty else None,
-                recipe_data.cuisine,
-                user_id,
-                datetime.now().isoformat(),
-                datetime.now().isoformat()
-            ))
-            
+            cursor.execute(_INSERT_RECIPE_SQL, self._recipe_row(recipe_data, user_id))
             recipe_id = cursor.lastrowid
             
             #insert tags
             if recipe_data.tags:
-                for tag in recipe_data.tags:
-                    cursor.execute("""
-                        INSERT INTO recipe_tags (recipe_id, tag_name)
-                        VALUES (?, ?)
-                    """, (recipe_id, tag.lower()))
+                cursor.executemany(
+                    "INSERT INTO recipe_tags (recipe_id, tag_name) VALUES (?, ?)",
+                    [(recipe_id, tag.lower()) for tag in recipe_data.tags]
+                )
             
             self.conn.commit()
+            invalidate_recommendation_cache()
             
             logger.info(f"created recipe {recipe_id}: {recipe_data.title}")
             
@@ -109,6 +87,96 @@ class RecipeManager:
             logger.error(f"error creating recipe: {e}")
             raise
     
+    async def create_recipes_bulk(
+        self,
+        recipes: List[RecipeCreate],
+        user_id: Optional[int] = None
+    ) -> List[int]:
+        """
+        create several recipes in a single transaction
+        
+        args:
+            recipes: recipe creation data, in order
+            user_id: id of user creating the recipes (optional)
+            
+        returns:
+            new recipe ids, in the same order as recipes
+        """
+        if not recipes:
+            return []
+        
+        try:
+            cursor = self.conn.cursor()
+            recipe_ids = []
+            tag_rows = []
+            
+            #lastrowid is needed per recipe, so recipes are inserted one by one;
+            #tags go in with one executemany and everything shares one commit
+            for recipe_data in recipes:
+                cursor.execute(_INSERT_RECIPE_SQL, self._recipe_row(recipe_data, user_id))
+                recipe_id = cursor.lastrowid
+                recipe_ids.append(recipe_id)
+                tag_rows.extend((recipe_id, tag.lower()) for tag in recipe_data.tags)
+            
+            if tag_rows:
+                cursor.executemany(
+                    "INSERT INTO recipe_tags (recipe_id, tag_name) VALUES (?, ?)",
+                    tag_rows
+                )
+            
+            self.conn.commit()
+            invalidate_recommendation_cache()
+            
+            logger.info(f"created {len(recipe_ids)} recipes in bulk")
+            return recipe_ids
+            
+        except sqlite3.IntegrityError as e:
+            self.conn.rollback()
+            logger.error(f"integrity error creating recipes: {e}")
+            raise ValueError("recipe with this data already exists")
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"error creating recipes: {e}")
+            raise
+    
+    @staticmethod
+    def _recipe_row(recipe_data: RecipeCreate, user_id: Optional[int]) -> tuple:
+        """build the recipes insert parameters for _INSERT_RECIPE_SQL"""
+        #serialize json fields
+        ingredients_json = json.dumps([ing.model_dump() for ing in recipe_data.ingredients])
+        instructions_json = json.dumps(recipe_data.instructions)
+        nutrition_json = json.dumps(recipe_data.nutrition.model_dump()) if recipe_data.nutrition else None
+        
+        #calculate total time
+        total_time = None
+        if recipe_data.prep_time_minutes and recipe_data.cook_time_minutes:
+            total_time = recipe_data.prep_time_minutes + recipe_data.cook_time_minutes
+        elif recipe_data.prep_time_minutes:
+            total_time = recipe_data.prep_time_minutes
+        elif recipe_data.cook_time_minutes:
+            total_time = recipe_data.cook_time_minutes
+        
+        now = datetime.now().isoformat()
+        return (
+            recipe_data.title,
+            recipe_data.description,
+            str(recipe_data.source_url) if recipe_data.source_url else None,
+            recipe_data.source_name,
+            ingredients_json,
+            instructions_json,
+            nutrition_json,
+            str(recipe_data.image_url) if recipe_data.image_url else None,
+            recipe_data.prep_time_minutes,
+            recipe_data.cook_time_minutes,
+            total_time,
+            recipe_data.servings,
+            recipe_data.difficulty.value if recipe_data.difficulty else None,
+            recipe_data.cuisine,
+            user_id,
+            now,
+            now
+        )
+    
     async def get_recipe(
         self,
         recipe_id: int,
@@ -181,13 +249,13 @@ class RecipeManager:
             
             #parse json fields
             ingredients = [
-                RecipeIngredient(**ing)
+                RecipeIngredient.model_validate(ing)
                 for ing in json.loads(row['ingredients_json'])
             ]
             instructions = json.loads(row['instructions_json'])
             nutrition = None
             if row['nutrition_json']:
-                nutrition = RecipeNutrition(**json.loads(row['nutrition_json']))
+                nutrition = RecipeNutrition.model_validate(json.loads(row['nutrition_json']))
             
             #construct response
             recipe = RecipeResponse(
@@ -356,6 +424,7 @@ class RecipeManager:
                     """, (recipe_id, tag.lower()))
             
             self.conn.commit()
+            invalidate_recommendation_cache()
             
             logger.info(f"updated recipe {recipe_id}")
             
@@ -404,6 +473,7 @@ class RecipeManager:
             """, (datetime.now().isoformat(), recipe_id))
             
             self.conn.commit()
+            invalidate_recommendation_cache()
             
             logger.info(f"deleted recipe {recipe_id}")
             return True
@@ -498,12 +568,21 @@ class RecipeManager:
                 params.append(len(search_params.tags))
             
             #ingredients filter (recipe must contain all specified ingredients)
+            #one lookup in the ingredient-name index; matching is by word prefix
+            #("chick" finds "chicken thighs", "auce" doesn't find "soy sauce"),
+            #and an ingredient with no word characters can't match anything
             if search_params.ingredients:
-                ingredient_conditions = []
-                for ing in search_params.ingredients:
-                    ingredient_conditions.append("LOWER(ingredients_json) LIKE ?")
-                    params.append(f"%{ing.lower()}%")
-                where_clauses.append(f"({' AND '.join(ingredient_conditions)})")
+                fts_queries = [_fts_ingredient_match(ing) for ing in search_params.ingredients]
+                if all(fts_queries):
+                    where_clauses.append("""
+                        id IN (
+                            SELECT rowid FROM recipe_ingredients_fts
+                            WHERE recipe_ingredients_fts MATCH ?
+                        )
+                    """)
+                    params.append(" AND ".join(fts_queries))
+                else:
+                    where_clauses.append("0")
             
             #exclude ingredients filter
             if search_params.exclude_ingredients:
@@ -595,6 +674,7 @@ class RecipeManager:
                 VALUES (?, ?)
             """, (user_id, recipe_id))
             self.conn.commit()
+            invalidate_recommendation_cache()
             logger.info(f"user {user_id} favorited recipe {recipe_id}")
             return True
         except sqlite3.IntegrityError:
@@ -615,6 +695,7 @@ class RecipeManager:
             self.conn.commit()
             deleted = cursor.rowcount > 0
             if deleted:
+                invalidate_recommendation_cache()
                 logger.info(f"user {user_id} unfavorited recipe {recipe_id}")
             return deleted
         except Exception as e:
@@ -1,16 +1,53 @@
 from typing import Optional, Dict, Any
-from recipe_scrapers import scrape_me, WebsiteNotImplementedError, NoSchemaFoundInWildMode
+from recipe_scrapers import scrape_html, WebsiteNotImplementedError, NoSchemaFoundInWildMode
+import asyncio
+import httpx
 import logging
+import os
 from src.models.recipe import RecipeCreate, RecipeIngredient, RecipeNutrition, DifficultyLevel
 import re
 
 logger = logging.getLogger(__name__)
 
 
+#many recipe sites reject the default httpx user agent
+SCRAPER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0"
+}
+SCRAPER_TIMEOUT = 15.0
+
+#html parsing is cpu-bound; admit at most one parse per core so a burst of
+#imports queues here instead of thrashing the threadpool
+_PARSE_SEMAPHORE = asyncio.Semaphore(os.cpu_count() or 4)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """shared keep-alive client for recipe page fetches (owned by the app lifespan)"""
+    return httpx.AsyncClient(
+        timeout=SCRAPER_TIMEOUT,
+        headers=SCRAPER_HEADERS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+
+
 class RecipeScraperService:
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.supported_sites_count = 100
+        self.http_client = http_client
+    
+    async def _fetch_html(self, url: str) -> str:
+        """fetch page html without blocking the event loop"""
+        if self.http_client is not None:
+            response = await self.http_client.get(url)
+            response.raise_for_status()
+            return response.text
+        
+        async with create_http_client() as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.text
     
     async def scrape_recipe_from_url(self, url: str) -> Optional[RecipeCreate]:
         """
@@ -25,8 +62,11 @@ class RecipeScraperService:
         try:
             logger.info(f"scraping recipe from url: {url}")
             
-            #use recipe-scrapers library
-            scraper = scrape_me(url, wild_mode=True)
+            #fetch asynchronously, then hand the html to recipe-scrapers;
+            #parsing is cpu-bound so it runs on a worker thread
+            html = await self._fetch_html(url)
+            async with _PARSE_SEMAPHORE:
+                scraper = await asyncio.to_thread(scrape_html, html, org_url=url, wild_mode=True)
             
             #extract basic information
             title = scraper.title()
@@ -117,6 +157,9 @@ class RecipeScraperService:
         except NoSchemaFoundInWildMode:
             logger.error(f"no recipe schema found on page: {url}")
             return None
+        except httpx.HTTPError as e:
+            logger.error(f"error fetching recipe page {url}: {str(e)}")
+            return None
         except Exception as e:
             logger.error(f"error scraping recipe from {url}: {str(e)}")
             return None
@@ -131,7 +174,7 @@ class RecipeScraperService:
             
             #basic parsing - extract quantity, unit, and name
             ingredient_data = self._parse_ingredient_string(ing.strip())
-            ingredients.append(RecipeIngredient(**ingredient_data))
+            ingredients.append(RecipeIngredient.model_validate(ingredient_data))
         
         return ingredients
     
@@ -260,7 +303,7 @@ class RecipeScraperService:
                         nutrition_data[model_key] = value
             
             if nutrition_data:
-                return RecipeNutrition(**nutrition_data)
+                return RecipeNutrition.model_validate(nutrition_data)
             
             return None
         except Exception as e:
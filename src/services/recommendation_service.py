@@ -6,11 +6,26 @@ provides intelligent recipe recommendations based on various factors
 import sqlite3
 import json
 import logging
+import time
 from typing import List, Dict, Optional, Tuple
-from collections import Counter
+from collections import Counter, OrderedDict
 
 logger = logging.getLogger(__name__)
 
+#per-user recommendations are memoized across requests; entries are keyed on
+#a version stamp so writes invalidate everything without walking the cache,
+#and the ttl picks up changes (e.g. profile preferences) that don't bump it
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL_SECONDS = 300
+_user_cache: "OrderedDict[Tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+_cache_version = 0
+
+
+def invalidate_recommendation_cache() -> None:
+    """drop memoized recommendations after recipe, favorite or rating writes"""
+    global _cache_version
+    _cache_version += 1
+
 
 class RecommendationService:
     """manages recipe recommendations"""
@@ -29,6 +44,12 @@ class RecommendationService:
         get personalized recipe recommendations for user
         based on favorites, ratings, and dietary preferences
         """
+        key = (_cache_version, user_id, limit, exclude_viewed)
+        cached = _user_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            _user_cache.move_to_end(key)
+            return cached[1]
+        
         try:
             cursor = self.conn.cursor()
             
@@ -169,6 +190,11 @@ class RecommendationService:
                     'recommendation_score': round(item['score'], 1)
                 })
             
+            _user_cache[key] = (time.monotonic() + USER_CACHE_TTL_SECONDS, recommendations)
+            _user_cache.move_to_end(key)
+            if len(_user_cache) > USER_CACHE_SIZE:
+                _user_cache.popitem(last=False)
+            
             return recommendations
             
         except Exception as e:
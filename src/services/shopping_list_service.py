@@ -3,9 +3,11 @@ shopping list service
 handles shopping list crud and auto-generation from meal plans/recipes
 """
 
+import asyncio
 import sqlite3
 import json
 import logging
+import orjson
 from typing import Optional, List, Tuple, Dict
 from datetime import datetime
 from collections import defaultdict
@@ -74,16 +76,15 @@ class ShoppingListService:
             if list_data.custom_items:
                 all_items.extend(list_data.custom_items)
             
-            #consolidate and organize items
-            consolidated_items = self._consolidate_items(all_items)
-            
-            #exclude pantry items if requested
+            #exclude pantry items if requested (matched on the lowercased name,
+            #so filtering before consolidation gives the same result)
             if list_data.exclude_pantry:
-                consolidated_items = await self._exclude_pantry_items(consolidated_items, user_id)
+                all_items = await self._exclude_pantry_items(all_items, user_id)
             
-            #categorize items if requested
-            if list_data.group_by_category:
-                consolidated_items = self._categorize_items(consolidated_items)
+            #consolidate and organize items off the event loop
+            consolidated_items = await asyncio.to_thread(
+                self._organize_items, all_items, list_data.group_by_category
+            )
             
             #serialize items
             items_json = json.dumps([item.model_dump() for item in consolidated_items])
@@ -133,8 +134,9 @@ class ShoppingListService:
             if not row:
                 return None
             
-            #deserialize items
-            items = [ShoppingItem(**item) for item in json.loads(row['items_json'])]
+            #deserialize items; items_json is only ever written from validated
+            #ShoppingItem.model_dump(), so skip re-running the validators
+            items = [ShoppingItem.model_construct(**item) for item in json.loads(row['items_json'])]
             
             #calculate stats
             total_items = len(items)
@@ -278,7 +280,7 @@ class ShoppingListService:
             
             lists = []
             for row in rows:
-                items = [ShoppingItem(**item) for item in json.loads(row['items_json'])]
+                items = [ShoppingItem.model_construct(**item) for item in json.loads(row['items_json'])]
                 total_items = len(items)
                 checked_items = sum(1 for item in items if item.checked)
                 
@@ -357,7 +359,7 @@ class ShoppingListService:
             items = []
             for row in rows:
                 recipe_id = row['id']
-                ingredients = json.loads(row['ingredients_json'])
+                ingredients = orjson.loads(row['ingredients_json'])
                 for ing in ingredients:
                     items.append(ShoppingItem(
                         ingredient=ing['name'],
@@ -373,6 +375,17 @@ class ShoppingListService:
             logger.error(f"error getting items from recipes: {e}")
             return []
     
+    def _organize_items(
+        self,
+        items: List[ShoppingItem],
+        group_by_category: bool
+    ) -> List[ShoppingItem]:
+        """consolidate and optionally categorize items (pure cpu, runs in a worker thread)"""
+        consolidated_items = self._consolidate_items(items)
+        if group_by_category:
+            consolidated_items = self._categorize_items(consolidated_items)
+        return consolidated_items
+    
     def _consolidate_items(self, items: List[ShoppingItem]) -> List[ShoppingItem]:
         """combine duplicate ingredients"""
         consolidated = defaultdict(lambda: {'quantity': 0, 'unit': None, 'notes': []})
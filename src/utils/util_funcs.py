@@ -7,6 +7,12 @@ import re
 import time
 from typing import List, Dict, Any
 
+# compiled once at import instead of per call
+_MEASUREMENT_RE = re.compile(r'\b(?:cups?|tbsp|tsp|lbs?|oz|pounds?)\b')
+_NON_NAME_CHARS_RE = re.compile(r'[\d\-\(\)\/]')
+_ID_STRIP_RE = re.compile(r'[^a-z0-9\s]')
+_ID_SPACE_RE = re.compile(r'\s+')
+
 def clean_ingredient_name(ingredient: str) -> str:
     """
     Clean and standardize ingredient names
@@ -17,12 +23,11 @@ def clean_ingredient_name(ingredient: str) -> str:
     
     cleaned = ingredient.lower().strip()
 
-    measurement_words = ['cup', 'cups', 'tbsp', 'tsp', 'lb', 'lbs', 'oz', 'pound', 'pounds']
-    for word in measurement_words:
-        cleaned = re.sub(rf'\b{word}\b', '', cleaned)
+    # one pass over all measurement words
+    cleaned = _MEASUREMENT_RE.sub('', cleaned)
     
     # remove common prefixes and suffixes
-    cleaned = re.sub(r'[\d\-\(\)\/]', '', cleaned)
+    cleaned = _NON_NAME_CHARS_RE.sub('', cleaned)
     
     # clean up extra spaces
     cleaned = ' '.join(cleaned.split())
@@ -147,8 +152,8 @@ def get_recipe_id_from_name(recipe_name: str) -> str:
     
     # Convert to lowercase, replace spaces with underscores, remove special chars
     recipe_id = recipe_name.lower()
-    recipe_id = re.sub(r'[^a-z0-9\s]', '', recipe_id)
-    recipe_id = re.sub(r'\s+', '_', recipe_id)
+    recipe_id = _ID_STRIP_RE.sub('', recipe_id)
+    recipe_id = _ID_SPACE_RE.sub('_', recipe_id)
     recipe_id = recipe_id.strip('_')
     
     return recipe_id if recipe_id else f"recipe_{int(time.time())}"
@@ -188,3 +188,32 @@ def temp_directory() -> Generator[Path, None, None]:
     yield temp_dir
     shutil.rmtree(temp_dir, ignore_errors=True)
 
+
+
+@pytest.fixture(scope="function")
+def isolated_db(temp_directory: Path, monkeypatch) -> Generator[DatabaseManager, None, None]:
+    """
+    fresh database behind get_db() for tests that go through the app;
+    the manager is a process-wide singleton, so both handles are swapped
+    """
+    import src.database.db_manager as db_module
+    
+    monkeypatch.setattr(DatabaseManager, "_instance", None)
+    db_manager = DatabaseManager(db_path=str(temp_directory / "recipe_assistant.db"))
+    monkeypatch.setattr(db_module, "_db_instance", db_manager)
+    
+    yield db_manager
+    
+    db_manager.close()
+
+
+@pytest.fixture(scope="function")
+def db_user_id(isolated_db: DatabaseManager) -> int:
+    """id of a user row in the isolated database"""
+    cursor = isolated_db.conn.cursor()
+    cursor.execute(
+        "INSERT INTO users (email, password_hash, full_name) VALUES (?, ?, ?)",
+        ("cook@example.com", "not-a-real-hash", "Test Cook")
+    )
+    isolated_db.conn.commit()
+    return cursor.lastrowid
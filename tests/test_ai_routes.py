@@ -0,0 +1,477 @@
+"""
+ai route tests
+tests for request coalescing, the streaming endpoints and batched meal plans
+"""
+
+import asyncio
+import json
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.routes import ai
+from src.auth.dependencies import get_current_user
+from src.database.db_manager import DatabaseManager
+from src.services.claude_client import ClaudeClient, ClaudeClientFactory
+
+
+RECIPE_TEXT = json.dumps({
+    "title": "Tomato Soup",
+    "description": "simple soup",
+    "ingredients": [{"name": "tomato", "quantity": 4}],
+    "instructions": ["simmer", "blend"],
+    "servings": 2
+})
+
+
+def parse_sse(body: str) -> list:
+    """split a text/event-stream body into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event = "message"
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+def stream_of(*chunks, error: Exception = None):
+    """stub for a ClaudeClient stream_* method yielding the given chunks"""
+    def stream(**kwargs):
+        async def gen():
+            for chunk in chunks:
+                yield chunk
+            if error is not None:
+                raise error
+        return gen()
+    return stream
+
+
+class FakeBatches:
+    """in-memory stand-in for the async client's messages.batches"""
+
+    def __init__(self):
+        self.status = "in_progress"
+        self.requests = []
+        self.results_calls = 0
+
+    async def create(self, requests):
+        self.requests = list(requests)
+        return SimpleNamespace(id="msgbatch_test")
+
+    async def retrieve(self, batch_id):
+        return SimpleNamespace(processing_status=self.status)
+
+    async def results(self, batch_id):
+        self.results_calls += 1
+
+        async def gen():
+            for request in self.requests:
+                yield SimpleNamespace(
+                    custom_id=request["custom_id"],
+                    result=SimpleNamespace(
+                        type="succeeded",
+                        message=SimpleNamespace(content=[SimpleNamespace(text=RECIPE_TEXT)])
+                    )
+                )
+        return gen()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def fresh_ai_caches(monkeypatch):
+    """empty coalescing state and no system key, so tests don't leak into each other"""
+    monkeypatch.setattr(ai, "_ai_results", OrderedDict())
+    monkeypatch.setattr(ai, "_ai_inflight", {})
+    monkeypatch.setattr(ai, "HAS_SYSTEM_KEY", False)
+    monkeypatch.setattr(ai, "SYSTEM_API_KEY", None)
+
+
+@pytest.fixture(scope="function")
+def claude_client() -> ClaudeClient:
+    """claude client for a personal key; no request leaves the process in these tests"""
+    return ClaudeClient("sk-ant-test-key")
+
+
+@pytest.fixture(scope="function")
+def api_client(isolated_db: DatabaseManager, db_user_id: int, claude_client: ClaudeClient):
+    """test client authenticated as db_user_id and using claude_client"""
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=db_user_id)
+    app.dependency_overrides[ai.get_claude_client] = lambda: claude_client
+
+    yield TestClient(app)
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.unit
+class TestCoalescedAICall:
+    """test sharing AI calls between identical requests"""
+
+    async def test_concurrent_identical_calls_share_one(self, claude_client: ClaudeClient):
+        """test concurrent requests with one key make a single call"""
+        calls = []
+
+        async def make_call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"answer": 42}
+
+        key = ai._ai_request_key("cooking_answer", claude_client, {"question": "why"})
+        results = await asyncio.gather(*(ai._coalesced_ai_call(key, make_call) for _ in range(3)))
+
+        assert results == [{"answer": 42}] * 3
+        assert len(calls) == 1
+
+    async def test_result_is_reused_after_completion(self, claude_client: ClaudeClient):
+        """test a finished result serves later identical requests"""
+        calls = []
+
+        async def make_call():
+            calls.append(1)
+            return len(calls)
+
+        key = ai._ai_request_key("pairings", claude_client, {"ingredient": "basil"})
+        assert await ai._coalesced_ai_call(key, make_call) == 1
+        assert await ai._coalesced_ai_call(key, make_call) == 1
+        assert len(calls) == 1
+
+    async def test_different_credentials_do_not_share(self):
+        """test identical payloads on different API keys each make their own call"""
+        first, second = ClaudeClient("sk-ant-first"), ClaudeClient("sk-ant-second")
+        payload = {"question": "how long to rest steak"}
+        calls = []
+
+        def call_for(name):
+            async def make_call():
+                calls.append(name)
+                await asyncio.sleep(0.01)
+                return name
+            return make_call
+
+        first_key = ai._ai_request_key("cooking_answer", first, payload)
+        second_key = ai._ai_request_key("cooking_answer", second, payload)
+        assert first_key != second_key
+
+        results = await asyncio.gather(
+            ai._coalesced_ai_call(first_key, call_for("first")),
+            ai._coalesced_ai_call(second_key, call_for("second"))
+        )
+
+        assert results == ["first", "second"]
+        assert sorted(calls) == ["first", "second"]
+        # and neither key's cached result answers for the other
+        assert await ai._coalesced_ai_call(second_key, call_for("again")) == "second"
+
+    async def test_no_reuse_skips_the_result_cache(self, claude_client: ClaudeClient):
+        """test reuse_result=False still joins in-flight calls but never caches"""
+        calls = []
+
+        async def make_call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        key = ai._ai_request_key("recipe_from_ingredients", claude_client, {"ingredients": ["egg"]})
+        joined = await asyncio.gather(
+            ai._coalesced_ai_call(key, make_call, reuse_result=False),
+            ai._coalesced_ai_call(key, make_call, reuse_result=False)
+        )
+        assert joined == [1, 1]
+
+        assert await ai._coalesced_ai_call(key, make_call, reuse_result=False) == 2
+        assert key not in ai._ai_results
+
+    async def test_failures_reach_waiters_and_are_not_cached(self, claude_client: ClaudeClient):
+        """test an error goes to every waiter and the next request retries"""
+        calls = []
+
+        async def failing_call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("api down")
+
+        key = ai._ai_request_key("substitutions", claude_client, {"ingredient": "butter"})
+        results = await asyncio.gather(
+            ai._coalesced_ai_call(key, failing_call),
+            ai._coalesced_ai_call(key, failing_call),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert len(calls) == 1
+        assert key not in ai._ai_inflight
+
+        async def working_call():
+            return "ok"
+
+        assert await ai._coalesced_ai_call(key, working_call) == "ok"
+
+    async def test_cancelled_leader_hands_off_to_waiters(self, claude_client: ClaudeClient):
+        """test a waiter retries instead of failing when the call it joined is cancelled"""
+        calls = []
+        started = asyncio.Event()
+
+        async def make_call():
+            calls.append(1)
+            started.set()
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        key = ai._ai_request_key("cooking_answer", claude_client, {"question": "cancel me"})
+        leader = asyncio.create_task(ai._coalesced_ai_call(key, make_call))
+        await started.wait()
+        follower = asyncio.create_task(ai._coalesced_ai_call(key, make_call))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == 2
+        assert leader.cancelled()
+        assert len(calls) == 2
+
+    async def test_cancelled_waiter_leaves_the_call_running(self, claude_client: ClaudeClient):
+        """test a waiter going away doesn't cancel the shared call"""
+        started = asyncio.Event()
+
+        async def make_call():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "done"
+
+        key = ai._ai_request_key("cooking_answer", claude_client, {"question": "keep going"})
+        leader = asyncio.create_task(ai._coalesced_ai_call(key, make_call))
+        await started.wait()
+        follower = asyncio.create_task(ai._coalesced_ai_call(key, make_call))
+        await asyncio.sleep(0)
+        follower.cancel()
+
+        assert await leader == "done"
+        assert follower.cancelled()
+
+
+@pytest.mark.integration
+@pytest.mark.api
+class TestGenerateRecipe:
+    """test recipe generation through the coalesced call"""
+
+    def test_asking_again_generates_a_new_recipe(self, api_client: TestClient, claude_client: ClaudeClient):
+        """test repeated identical requests aren't answered from a cached result"""
+        calls = []
+
+        async def generate(**kwargs):
+            calls.append(kwargs)
+            return {**json.loads(RECIPE_TEXT), "title": f"Tomato Soup {len(calls)}"}
+
+        claude_client.generate_recipe_from_ingredients = generate
+
+        titles = [
+            api_client.post("/api/v1/ai/generate-recipe", json={"ingredients": ["tomato"]}).json()["recipe"]["title"]
+            for _ in range(2)
+        ]
+
+        assert titles == ["Tomato Soup 1", "Tomato Soup 2"]
+        assert len(calls) == 2
+
+
+@pytest.mark.integration
+@pytest.mark.api
+class TestStreamingEndpoints:
+    """test the server-sent event endpoints"""
+
+    def test_generate_recipe_stream(self, api_client: TestClient, claude_client: ClaudeClient):
+        """test recipe text is streamed in chunks then parsed in the done event"""
+        half = len(RECIPE_TEXT) // 2
+        claude_client.stream_recipe_from_ingredients = stream_of(RECIPE_TEXT[:half], RECIPE_TEXT[half:])
+
+        response = api_client.post("/api/v1/ai/generate-recipe/stream", json={"ingredients": ["tomato"]})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert events[:2] == [("message", {"text": RECIPE_TEXT[:half]}), ("message", {"text": RECIPE_TEXT[half:]})]
+        event, data = events[-1]
+        assert event == "done"
+        assert data["recipe"]["title"] == "Tomato Soup"
+        assert data["saved"] is False
+
+    def test_generate_recipe_stream_saves(self, api_client: TestClient, claude_client: ClaudeClient):
+        """test save_recipe stores the parsed recipe and returns its id"""
+        claude_client.stream_recipe_from_description = stream_of(RECIPE_TEXT)
+
+        response = api_client.post(
+            "/api/v1/ai/generate-recipe/stream",
+            json={"description": "a warm soup", "save_recipe": True}
+        )
+
+        event, data = parse_sse(response.text)[-1]
+        assert event == "done"
+        assert data["saved"] is True
+        assert isinstance(data["recipe_id"], int)
+
+    def test_generate_recipe_stream_error_event(self, api_client: TestClient, claude_client: ClaudeClient):
+        """test a failure mid-stream ends with an error event"""
+        claude_client.stream_recipe_from_ingredients = stream_of("{", error=ValueError("cut off"))
+
+        response = api_client.post("/api/v1/ai/generate-recipe/stream", json={"ingredients": ["tomato"]})
+
+        assert response.status_code == 200
+        events = parse_sse(response.text)
+        assert events[0] == ("message", {"text": "{"})
+        assert events[-1][0] == "error"
+
+    def test_generate_recipe_stream_requires_input(self, api_client: TestClient):
+        """test a request with neither ingredients nor description is rejected"""
+        response = api_client.post("/api/v1/ai/generate-recipe/stream", json={})
+
+        assert response.status_code == 400
+
+    def test_generate_recipe_stream_requires_ai(self, api_client: TestClient):
+        """test streaming generation is unavailable without an API key"""
+        app.dependency_overrides[ai.get_claude_client] = lambda: None
+
+        response = api_client.post("/api/v1/ai/generate-recipe/stream", json={"ingredients": ["tomato"]})
+
+        assert response.status_code == 503
+
+    def test_ask_cooking_stream(self, api_client: TestClient, claude_client: ClaudeClient):
+        """test the answer is streamed in chunks and attributed to ai"""
+        claude_client.stream_cooking_answer = stream_of("Rest it ", "for 5 minutes.")
+
+        response = api_client.post("/api/v1/ai/ask-cooking/stream", json={"question": "how long to rest steak?"})
+
+        assert response.status_code == 200
+        assert parse_sse(response.text) == [
+            ("message", {"text": "Rest it "}),
+            ("message", {"text": "for 5 minutes."}),
+            ("done", {"source": "ai"})
+        ]
+
+    def test_ask_cooking_stream_without_ai(self, api_client: TestClient):
+        """test the knowledge base answer is sent as one chunk without an API key"""
+        app.dependency_overrides[ai.get_claude_client] = lambda: None
+
+        response = api_client.post("/api/v1/ai/ask-cooking/stream", json={"question": "how long to rest steak?"})
+
+        events = parse_sse(response.text)
+        assert len(events) == 2
+        assert events[0][0] == "message" and events[0][1]["text"]
+        assert events[1] == ("done", {"source": "knowledge_base"})
+
+
+@pytest.mark.integration
+@pytest.mark.api
+class TestMealPlanBatchStatus:
+    """test polling a meal plan submitted with async_mode"""
+
+    @pytest.fixture(scope="function")
+    def batches(self, claude_client: ClaudeClient, monkeypatch) -> FakeBatches:
+        """fake batch api behind the submitting client and every client the status route builds"""
+        batches = FakeBatches()
+        claude_client.async_client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+        self.built_keys = []
+
+        def build_client(api_key, **kwargs):
+            self.built_keys.append(api_key)
+            client = ClaudeClient(api_key, **kwargs)
+            client.async_client = claude_client.async_client
+            return client
+
+        monkeypatch.setattr(ai, "ClaudeClient", build_client)
+        return batches
+
+    def submit(self, api_client: TestClient) -> str:
+        # explicit preferences, so the profile lookup is skipped
+        response = api_client.post("/api/v1/ai/generate-meal-plan", json={
+            "days": 2, "async_mode": True, "meal_types": ["breakfast", "dinner"],
+            "dietary_restrictions": ["vegetarian"], "cuisine_preferences": ["italian"]
+        })
+        assert response.status_code == 200
+        assert response.json()["status"] == "processing"
+        return response.json()["batch_id"]
+
+    def test_submit_stores_encrypted_key(
+        self, api_client: TestClient, batches: FakeBatches, isolated_db: DatabaseManager
+    ):
+        """test one request per meal is submitted and the key isn't stored in the clear"""
+        batch_id = self.submit(api_client)
+
+        assert len(batches.requests) == 4
+        row = isolated_db.conn.execute(
+            "SELECT api_key_encrypted, status FROM ai_meal_plan_batches WHERE batch_id = ?", (batch_id,)
+        ).fetchone()
+        assert row["status"] == "processing"
+        assert row["api_key_encrypted"] and "sk-ant-test-key" not in row["api_key_encrypted"]
+
+    def test_processing_until_batch_ends(self, api_client: TestClient, batches: FakeBatches):
+        """test polls report processing while the batch runs"""
+        batch_id = self.submit(api_client)
+
+        response = api_client.get(f"/api/v1/ai/meal-plan/status/{batch_id}")
+
+        assert response.status_code == 200
+        assert response.json() == {"batch_id": batch_id, "status": "processing"}
+
+    def test_ended_batch_returns_meal_plan_once_collected(self, api_client: TestClient, batches: FakeBatches):
+        """test the finished plan is collected once then served from the stored response"""
+        batch_id = self.submit(api_client)
+        batches.status = "ended"
+
+        first = api_client.get(f"/api/v1/ai/meal-plan/status/{batch_id}")
+        second = api_client.get(f"/api/v1/ai/meal-plan/status/{batch_id}")
+
+        assert first.status_code == 200
+        data = first.json()
+        assert data["status"] == "ended"
+        assert data["saved"] is False
+        assert [sorted(day["meals"]) for day in data["meal_plan"]["days"]] == [["breakfast", "dinner"]] * 2
+        assert second.json() == data
+        assert batches.results_calls == 1
+
+    def test_polls_use_the_submitting_key(
+        self, api_client: TestClient, batches: FakeBatches, db_user_id: int, monkeypatch
+    ):
+        """test a poll after a key change reads with the old key without caching its client"""
+        batch_id = self.submit(api_client)
+        batches.status = "ended"
+        # the user's current key; it shares the factory's cache slot with the old one
+        current = ClaudeClient("sk-ant-test-new-key")
+        slot = f"{db_user_id}:{current.api_key[:8]}"
+        monkeypatch.setitem(ClaudeClientFactory._user_clients, slot, current)
+
+        response = api_client.get(f"/api/v1/ai/meal-plan/status/{batch_id}")
+
+        assert response.json()["status"] == "ended"
+        assert self.built_keys == ["sk-ant-test-key"]
+        assert ClaudeClientFactory._user_clients[slot] is current
+
+    def test_unknown_batch(self, api_client: TestClient, batches: FakeBatches):
+        """test an unknown batch id is a 404"""
+        response = api_client.get("/api/v1/ai/meal-plan/status/msgbatch_missing")
+
+        assert response.status_code == 404
+
+    def test_other_users_batch(self, api_client: TestClient, batches: FakeBatches):
+        """test a batch can't be polled by another user"""
+        batch_id = self.submit(api_client)
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=999999)
+
+        response = api_client.get(f"/api/v1/ai/meal-plan/status/{batch_id}")
+
+        assert response.status_code == 404
+
+
+@pytest.mark.integration
+@pytest.mark.api
+class TestUserAPIKey:
+    """test setting a personal api key"""
+
+    def test_bad_prefix_is_rejected(self, api_client: TestClient):
+        """test a key without the sk-ant- prefix gets the documented 400"""
+        response = api_client.post("/api/v1/ai/api-key", json={"api_key": "not-a-claude-key-1234567890"})
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid Claude API key format"
@@ -0,0 +1,146 @@
+"""
+recipe search tests
+tests for the ingredient filter and the ingredient-name fts index behind it
+"""
+
+import pytest
+
+from src.database.db_manager import DatabaseManager
+from src.models.recipe import RecipeCreate, RecipeIngredient, RecipeSearch, RecipeUpdate
+from src.services.recipe_manager import RecipeManager, _fts_ingredient_match
+
+
+def make_recipe(title: str, ingredients: list) -> RecipeCreate:
+    """minimal recipe with the given ingredient names"""
+    return RecipeCreate(
+        title=title,
+        ingredients=[RecipeIngredient(name=name) for name in ingredients],
+        instructions=["cook everything"]
+    )
+
+
+@pytest.fixture(scope="function")
+def recipe_manager(isolated_db: DatabaseManager) -> RecipeManager:
+    """recipe manager on the isolated database"""
+    return RecipeManager(isolated_db.conn)
+
+
+async def search_titles(recipe_manager: RecipeManager, **params) -> set:
+    """titles of the recipes a search returns"""
+    recipes, total = await recipe_manager.search_recipes(RecipeSearch(**params))
+    assert total == len(recipes)
+    return {r.title for r in recipes}
+
+
+def indexed_rowids(db: DatabaseManager, ingredient: str) -> set:
+    """recipe ids the ingredient-name index returns for an ingredient"""
+    rows = db.conn.execute(
+        "SELECT rowid FROM recipe_ingredients_fts WHERE recipe_ingredients_fts MATCH ?",
+        (_fts_ingredient_match(ingredient),)
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+@pytest.mark.unit
+class TestFtsIngredientMatch:
+    """test building the fts query for one ingredient"""
+
+    def test_prefix_phrase_on_names_column(self):
+        """test the query is a prefix phrase scoped to the names column"""
+        assert _fts_ingredient_match("Chicken Breast") == 'names : "chicken breast"*'
+
+    def test_quotes_are_escaped(self):
+        """test double quotes can't end the phrase early"""
+        assert _fts_ingredient_match('5" tortilla') == 'names : "5"" tortilla"*'
+
+    def test_no_query_without_alphanumerics(self):
+        """test punctuation-only input has no query"""
+        assert _fts_ingredient_match("-*") is None
+
+
+@pytest.mark.integration
+@pytest.mark.database
+class TestIngredientSearch:
+    """test searching recipes by ingredients"""
+
+    async def test_matches_word_prefix(self, recipe_manager: RecipeManager, db_user_id: int):
+        """test an ingredient matches names starting with it"""
+        await recipe_manager.create_recipe(make_recipe("Roast Chicken", ["Chicken thighs", "salt"]), db_user_id)
+        await recipe_manager.create_recipe(make_recipe("Garlic Bread", ["bread", "garlic"]), db_user_id)
+
+        assert await search_titles(recipe_manager, ingredients=["chick"]) == {"Roast Chicken"}
+
+    async def test_requires_every_ingredient(self, recipe_manager: RecipeManager, db_user_id: int):
+        """test all requested ingredients must be present"""
+        await recipe_manager.create_recipe(make_recipe("Omelette", ["eggs", "butter"]), db_user_id)
+        await recipe_manager.create_recipe(make_recipe("Scrambled Eggs", ["eggs", "milk"]), db_user_id)
+
+        assert await search_titles(recipe_manager, ingredients=["eggs", "butter"]) == {"Omelette"}
+
+    async def test_mid_word_substring_does_not_match(self, recipe_manager: RecipeManager, db_user_id: int):
+        """test matching is by word prefix, not substring"""
+        await recipe_manager.create_recipe(make_recipe("Stir Fry", ["soy sauce", "broccoli"]), db_user_id)
+
+        assert await search_titles(recipe_manager, ingredients=["auce"]) == set()
+        assert await search_titles(recipe_manager, ingredients=["sauce"]) == {"Stir Fry"}
+
+    async def test_json_keys_do_not_match(self, recipe_manager: RecipeManager, db_user_id: int):
+        """test only ingredient names are indexed, not the stored json"""
+        await recipe_manager.create_recipe(make_recipe("Toast", ["bread", "butter"]), db_user_id)
+
+        assert await search_titles(recipe_manager, ingredients=["quantity"]) == set()
+
+    async def test_punctuation_only_ingredient(self, recipe_manager: RecipeManager, db_user_id: int):
+        """test an ingredient without word characters matches nothing"""
+        await recipe_manager.create_recipe(make_recipe("Irish Coffee", ["coffee", "half-and-half"]), db_user_id)
+
+        assert await search_titles(recipe_manager, ingredients=["-"]) == set()
+        assert await search_titles(recipe_manager, ingredients=["coffee", "-"]) == set()
+
+    async def test_filter_does_not_scan_recipes(self, recipe_manager: RecipeManager, isolated_db: DatabaseManager):
+        """test the filter is answered from the index rather than a table scan"""
+        plan = isolated_db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM recipes WHERE is_deleted = 0 AND id IN "
+            "(SELECT rowid FROM recipe_ingredients_fts WHERE recipe_ingredients_fts MATCH ?)",
+            (_fts_ingredient_match("egg"),)
+        ).fetchall()
+        details = [row[3] for row in plan]
+
+        assert not any(d.startswith("SCAN recipes") for d in details)
+        assert any("recipe_ingredients_fts" in d for d in details)
+
+    async def test_index_follows_updates(
+        self, recipe_manager: RecipeManager, isolated_db: DatabaseManager, db_user_id: int
+    ):
+        """test changing a recipe's ingredients moves it in the index"""
+        recipe = await recipe_manager.create_recipe(make_recipe("Pasta", ["spaghetti", "basil"]), db_user_id)
+
+        await recipe_manager.update_recipe(
+            recipe.id,
+            RecipeUpdate(ingredients=[RecipeIngredient(name="penne"), RecipeIngredient(name="basil")]),
+            db_user_id
+        )
+
+        assert indexed_rowids(isolated_db, "spaghetti") == set()
+        assert indexed_rowids(isolated_db, "penne") == {recipe.id}
+        assert await search_titles(recipe_manager, ingredients=["spaghetti"]) == set()
+        assert await search_titles(recipe_manager, ingredients=["penne"]) == {"Pasta"}
+
+    async def test_deleted_recipes_are_excluded(self, recipe_manager: RecipeManager, db_user_id: int):
+        """test soft-deleted recipes don't come back from an indexed match"""
+        recipe = await recipe_manager.create_recipe(make_recipe("Pancakes", ["flour", "eggs"]), db_user_id)
+        await recipe_manager.delete_recipe(recipe.id, db_user_id)
+
+        assert await search_titles(recipe_manager, ingredients=["flour"]) == set()
+
+    async def test_hard_delete_clears_index(
+        self, recipe_manager: RecipeManager, isolated_db: DatabaseManager, db_user_id: int
+    ):
+        """test removing the row removes its index entry"""
+        recipe = await recipe_manager.create_recipe(make_recipe("Salsa", ["tomato", "onion"]), db_user_id)
+        assert indexed_rowids(isolated_db, "tomato") == {recipe.id}
+
+        isolated_db.conn.execute("DELETE FROM recipes WHERE id = ?", (recipe.id,))
+        isolated_db.conn.commit()
+
+        assert indexed_rowids(isolated_db, "tomato") == set()